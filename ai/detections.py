@@ -0,0 +1,86 @@
+# detections.py
+"""
+Compact detection records for the per-frame recognition path.
+
+Detections are stored as NumPy structured arrays instead of DataFrames, so
+building them costs a single allocation per frame and filtering by
+confidence is a vectorized mask. A single record (``detections[i]``) still
+supports field access such as ``plate["xmin"]``.
+"""
+
+import numpy as np
+
+# Plate boxes from the plate model: coords [xmin, ymin, xmax, ymax] + score
+PLATE_DTYPE = np.dtype([
+    ("xmin", np.float32),
+    ("ymin", np.float32),
+    ("xmax", np.float32),
+    ("ymax", np.float32),
+    ("confidence", np.float32),
+])
+
+# Character boxes from the char model, same layout plus the predicted class
+CHAR_DTYPE = np.dtype([
+    ("xmin", np.float32),
+    ("ymin", np.float32),
+    ("xmax", np.float32),
+    ("ymax", np.float32),
+    ("confidence", np.float32),
+    ("cls", np.int32),
+])
+
+
+def make_detections(xyxy, confidence, cls=None):
+    """
+    Build a detection record array from model outputs.
+
+    Parameters:
+    - xyxy (np.ndarray): Boxes as an (N, 4) array [xmin, ymin, xmax, ymax].
+    - confidence (np.ndarray): Scores as an (N,) array.
+    - cls (np.ndarray, optional): Predicted classes as an (N,) array. When
+      given, the records use ``CHAR_DTYPE``; otherwise ``PLATE_DTYPE``.
+
+    Returns:
+    - np.ndarray: Structured array with one record per detection.
+    """
+    dtype = PLATE_DTYPE if cls is None else CHAR_DTYPE
+    detections = np.empty(len(confidence), dtype=dtype)
+    if len(confidence) == 0:
+        return detections
+    xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+    detections["xmin"] = xyxy[:, 0]
+    detections["ymin"] = xyxy[:, 1]
+    detections["xmax"] = xyxy[:, 2]
+    detections["ymax"] = xyxy[:, 3]
+    detections["confidence"] = confidence
+    if cls is not None:
+        detections["cls"] = cls
+    return detections
+
+
+def filter_by_confidence(detections, threshold):
+    """
+    Keep the detections whose confidence is at least ``threshold``.
+
+    Parameters:
+    - detections (np.ndarray): Detection record array.
+    - threshold (float): Minimum confidence, in the model's 0-1 scale.
+
+    Returns:
+    - np.ndarray: The filtered record array.
+    """
+    return detections[detections["confidence"] >= threshold]
+
+
+def boxes_of(detections):
+    """
+    Get the boxes of a record array as a plain (N, 4) float array.
+
+    Parameters:
+    - detections (np.ndarray): Detection record array.
+
+    Returns:
+    - np.ndarray: Boxes as [xmin, ymin, xmax, ymax] rows.
+    """
+    return np.stack([detections["xmin"], detections["ymin"],
+                     detections["xmax"], detections["ymax"]], axis=-1)
@@ -0,0 +1,152 @@
+# frame_grabber.py
+"""
+Background frame capture for the recognition pipeline.
+
+The grabber reads frames from a ``cv2.VideoCapture`` on its own thread and
+keeps only the newest ones in a small bounded buffer, so a slow inference
+stage never makes the decoder (RTSP, webcam) fall behind real time.
+"""
+
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class FrameGrabber:
+    """
+    Reads frames on a dedicated thread into a bounded drop-oldest buffer.
+
+    Attributes:
+        capture (cv2.VideoCapture): The opened video source.
+        grabbed (int): Frames read from the source.
+        dropped (int): Frames discarded before inference could pick them up.
+        processed (int): Frames handed out to the inference stage.
+    """
+
+    def __init__(self, capture, buffer_size=2, realtime=False,
+                 frame_event=None):
+        """
+        Initialize the grabber.
+
+        Args:
+            capture (cv2.VideoCapture): An already opened video source.
+            buffer_size (int): Maximum number of frames kept in the buffer.
+            realtime (bool): If True, pace reads to the source FPS. Used for
+                video files, which would otherwise be decoded (and mostly
+                dropped) as fast as the disk allows.
+            frame_event (threading.Event): Optional event set whenever a
+                frame arrives or the source ends, so one consumer can wait
+                on several grabbers at once.
+        """
+        self.capture = capture
+        self.buffer = deque(maxlen=max(1, int(buffer_size)))
+        self.condition = threading.Condition()
+        self.running = False
+        self.finished = False
+        self.thread = None
+        self.frame_event = frame_event
+
+        self.grabbed = 0
+        self.dropped = 0
+        self.processed = 0
+
+        self.frame_interval = 0
+        if realtime:
+            fps = self.capture.get(cv2.CAP_PROP_FPS)
+            self.frame_interval = 1 / fps if fps and fps > 0 else 0
+
+    def start(self):
+        """Start the capture thread."""
+        self.running = True
+        self.finished = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        next_frame_time = time.perf_counter()
+        while self.running:
+            success, frame = self.capture.read()
+            if not success:
+                break
+            with self.condition:
+                self.grabbed += 1
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.dropped += 1
+                self.buffer.append(frame)
+                self.condition.notify()
+            if self.frame_event is not None:
+                self.frame_event.set()
+
+            if self.frame_interval:
+                next_frame_time += self.frame_interval
+                delay = next_frame_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame_time = time.perf_counter()
+
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+        if self.frame_event is not None:
+            self.frame_event.set()
+
+    def read_latest(self, timeout=1.0):
+        """
+        Return the newest buffered frame, discarding any older ones.
+
+        Args:
+            timeout (float): Seconds to wait for a frame to arrive.
+
+        Returns:
+            numpy.ndarray or None: The newest frame, or None if no frame
+            arrived in time or the source is exhausted.
+        """
+        with self.condition:
+            if not self.buffer and not self.finished:
+                self.condition.wait(timeout)
+            if not self.buffer:
+                return None
+            frame = self.buffer.pop()
+            self.dropped += len(self.buffer)
+            self.buffer.clear()
+            self.processed += 1
+            return frame
+
+    def is_alive(self):
+        """Return True while the source can still produce frames."""
+        with self.condition:
+            return not self.finished or bool(self.buffer)
+
+    def stop(self):
+        """
+        Stop the capture thread and release the video source.
+
+        Returns:
+            int: Position (frame index) the source had reached, so a video
+            file can be resumed from there.
+        """
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        position = int(self.capture.get(cv2.CAP_PROP_POS_FRAMES))
+        self.capture.release()
+        return position
+
+    def stats(self):
+        """
+        Get the capture counters.
+
+        Returns:
+            dict: Grabbed, dropped and processed frame counts.
+        """
+        with self.condition:
+            return {
+                "grabbed": self.grabbed,
+                "dropped": self.dropped,
+                "processed": self.processed,
+            }
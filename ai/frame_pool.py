@@ -0,0 +1,86 @@
+# frame_pool.py
+"""
+Preallocated frame buffers for handing frames from a worker to the GUI.
+
+A ``QImage`` built on a NumPy array borrows the array's memory. If the
+worker reuses or frees that array while the queued signal is still in
+flight, the GUI paints a torn or freed frame. The pool keeps a few buffers
+that are reused round-robin; a buffer belongs to the GUI from the moment it
+is emitted until the GUI releases it, and the worker never writes into a
+buffer it does not own.
+"""
+
+import threading
+
+import numpy as np
+
+
+class FramePool:
+    """
+    Round-robin pool of equally shaped frame buffers with ownership tracking.
+
+    Attributes:
+        buffers (list of np.ndarray): The preallocated buffers.
+        skipped (int): Frames not displayed because every buffer was still
+            owned by the GUI.
+    """
+
+    def __init__(self, shape, size=3, dtype=np.uint8):
+        """
+        Initialize the pool.
+
+        Args:
+            shape (tuple): Buffer shape as (height, width, channels).
+            size (int): Number of buffers.
+            dtype: Buffer data type.
+        """
+        self.size = size
+        self.dtype = dtype
+        self.lock = threading.Lock()
+        self.next_slot = 0
+        self.skipped = 0
+        self._allocate(shape)
+
+    def _allocate(self, shape):
+        self.shape = tuple(shape)
+        self.buffers = [np.empty(self.shape, dtype=self.dtype)
+                        for _ in range(self.size)]
+        self.in_use = [False] * self.size
+
+    def acquire(self, shape=None):
+        """
+        Take ownership of a free buffer.
+
+        Args:
+            shape (tuple, optional): Required buffer shape. The pool is
+                reallocated to it, but only while no buffer is in use.
+
+        Returns:
+            int or None: The slot of the acquired buffer, or None if no
+            buffer is free (the caller should skip the frame).
+        """
+        with self.lock:
+            if shape is not None and tuple(shape) != self.shape:
+                if any(self.in_use):
+                    self.skipped += 1
+                    return None
+                self._allocate(shape)
+
+            for offset in range(self.size):
+                slot = (self.next_slot + offset) % self.size
+                if not self.in_use[slot]:
+                    self.in_use[slot] = True
+                    self.next_slot = (slot + 1) % self.size
+                    return slot
+            self.skipped += 1
+            return None
+
+    def release(self, slot):
+        """
+        Give a buffer back to the pool once its consumer is done with it.
+
+        Args:
+            slot (int): Slot returned by ``acquire``.
+        """
+        with self.lock:
+            self.in_use[slot] = False
@@ -0,0 +1,140 @@
+# homography_cache.py
+"""
+Per-track cache of plate rectification homographies.
+
+Estimating a homography means edge detection, Hough lines, corner
+clustering and ``cv2.findHomography`` on the crop. A car waiting at the
+barrier is seen for dozens of frames with the plate barely moving, so the
+matrix found on one frame still rectifies the next ones. The cache keeps
+the last matrix of each plate track together with the box it was
+estimated on, and only estimates again when the box drifts or the track
+is new.
+"""
+
+import itertools
+import threading
+import time
+
+import cv2
+
+from ai.img_model import estimate_plate_homography
+
+
+class HomographyCache:
+    """
+    Homography matrices keyed by plate track ID.
+
+    Attributes:
+        hits (int): Crops rectified with a cached matrix.
+        misses (int): Crops that needed a new estimation.
+        failures (int): Estimations that found no plate corners.
+    """
+
+    def __init__(self, tolerance=0.05, max_idle=2.0):
+        """
+        Initialize the cache.
+
+        Args:
+            tolerance (float): Largest box drift, relative to the box size,
+                for which a cached matrix is reused.
+            max_idle (float): Seconds after which a track that was not seen
+                is forgotten.
+        """
+        self.tolerance = tolerance
+        self.max_idle = max_idle
+        self.lock = threading.Lock()
+        # track ID -> (box, H, (width, height), last seen)
+        self.tracks = {}
+        self.new_ids = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def drift(self, box, other):
+        """
+        Get how far a box moved, relative to its size.
+
+        Args:
+            box (tuple): Box as (xmin, ymin, xmax, ymax).
+            other (tuple): Previous box, same format.
+
+        Returns:
+            float: Largest edge displacement over the box width or height.
+        """
+        width = max(box[2] - box[0], 1)
+        height = max(box[3] - box[1], 1)
+        dx = max(abs(box[0] - other[0]), abs(box[2] - other[2])) / width
+        dy = max(abs(box[1] - other[1]), abs(box[3] - other[3])) / height
+        return max(dx, dy)
+
+    def _match(self, box):
+        # Without a tracker, the track is the cached box closest to this one
+        best, bestDrift = None, self.tolerance
+        for track_id, (cachedBox, _, _, _) in self.tracks.items():
+            boxDrift = self.drift(box, cachedBox)
+            if boxDrift <= bestDrift:
+                best, bestDrift = track_id, boxDrift
+        return best if best is not None else ("box", next(self.new_ids))
+
+    def _expire(self, now):
+        idle = [track_id for track_id, entry in self.tracks.items()
+                if now - entry[3] > self.max_idle]
+        for track_id in idle:
+            del self.tracks[track_id]
+
+    def warp(self, image, box, track_id=None):
+        """
+        Rectify a plate crop, reusing the track's matrix when possible.
+
+        Args:
+            image (numpy.ndarray): Plate crop.
+            box (tuple): Plate box in the frame as (xmin, ymin, xmax, ymax).
+            track_id (hashable, optional): Plate track ID. If not given, the
+                crop is matched to the cached track with the closest box.
+
+        Returns:
+            numpy.ndarray or None: The rectified crop, or None if no plate
+            corners were found.
+        """
+        box = tuple(float(v) for v in box)
+        now = time.monotonic()
+        with self.lock:
+            self._expire(now)
+            if track_id is None:
+                track_id = self._match(box)
+            entry = self.tracks.get(track_id)
+            if entry is not None and self.drift(box, entry[0]) <= self.tolerance:
+                self.hits += 1
+                _, H, size, _ = entry
+                # Keep the box the matrix was estimated on, so slow drift
+                # still ends up triggering a new estimation
+                self.tracks[track_id] = (entry[0], H, size, now)
+                return cv2.warpPerspective(image, H, size)
+            self.misses += 1
+
+        H = estimate_plate_homography(image)
+        with self.lock:
+            if H is None:
+                self.failures += 1
+                self.tracks.pop(track_id, None)
+                return None
+            size = (image.shape[1], image.shape[0])
+            self.tracks[track_id] = (box, H, size, now)
+        return cv2.warpPerspective(image, H, size)
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            dict: Hits, misses, failures, hit rate and cached tracks.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "failures": self.failures,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "tracks": len(self.tracks),
+            }
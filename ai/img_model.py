@@ -5,9 +5,6 @@ import numpy as np
 from PIL import Image
 from PIL.ImageQt import ImageQt
 from PySide6.QtGui import QPixmap
-from itertools import combinations
-from sklearn.cluster import KMeans  # type: ignore
-from shapely import LineString  # type: ignore
 
 
 def sharpen_new(img):
@@ -132,48 +129,50 @@ def apply_image_filters(image, bilateral=True, clahe=True, sharpening=True):
     return image
 
 
-def check_intersection(p1, p2, q1, q2):
+def find_segment_intersections(lines, max_lines=64, dot_threshold=0.6):
     """
-    Checks if two line segments (p1->p2 and q1->q2) intersect.
+    Computes the intersections of every pair of roughly perpendicular segments at once.
+
+    Pairs of segments whose directions are roughly perpendicular are
+    intersected; directions, angles and intersections are computed with
+    array broadcasting.
 
     Parameters:
-        p1, p2 (tuple): Points defining the first line segment.
-        q1, q2 (tuple): Points defining the second line segment.
+        lines (numpy.ndarray): Segments as returned by cv2.HoughLinesP, shape (N, 1, 4).
+        max_lines (int): Maximum number of segments considered (the first ones returned by Hough).
+        dot_threshold (float): Pairs whose absolute direction cosine is below this value are checked.
 
     Returns:
-        bool: True if the line segments intersect, False otherwise.
+        numpy.ndarray: Integer (x, y) intersection points, shape (M, 2), in pair order.  # noqa
     """
-    def normalize_vector(k1, k2):
-        v = k2-k1
-        magnitude = np.linalg.norm(v)
-        return v/magnitude
-
-    v1_norm = normalize_vector(np.array(p1), np.array(p2))
-    v2_norm = normalize_vector(np.array(q1), np.array(q2))
-
-    dot_prod = np.dot(v1_norm, v2_norm)
-
-    th = 0.6
-    if -1*th < dot_prod < th:
-        return True
-    else:
-        return False
-
+    segments = np.asarray(lines, dtype=np.float64).reshape(-1, 4)[:max_lines]
+    if len(segments) < 2:
+        return np.empty((0, 2), dtype=int)
 
-def find_intersection(p1, p2, p3, p4):
+    i, j = np.triu_indices(len(segments), k=1)
+    starts = segments[:, :2]
+    vectors = segments[:, 2:] - starts
 
-    line1 = LineString([p1, p2])
-    line2 = LineString([p3, p4])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        units = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        dot_prod = units[i, 0] * units[j, 0] + units[i, 1] * units[j, 1]
+        pairs = np.abs(dot_prod) < dot_threshold
+        i, j = i[pairs], j[pairs]
 
-    intersection = line1.intersection(line2)
+        r, s = vectors[i], vectors[j]
+        qp = starts[j] - starts[i]
+        cross = r[:, 0] * s[:, 1] - r[:, 1] * s[:, 0]
+        t = (qp[:, 0] * s[:, 1] - qp[:, 1] * s[:, 0]) / cross
+        u = (qp[:, 0] * r[:, 1] - qp[:, 1] * r[:, 0]) / cross
 
-    if intersection.is_empty:
-        return None
-    else:
-        return intersection.coords[0]
+    eps = 1e-9
+    hits = (t >= -eps) & (t <= 1 + eps) & (u >= -eps) & (u <= 1 + eps)
+    points = starts[i[hits]] + t[hits, None] * r[hits]
+    # Round off float noise (108.9999 vs 109) before truncating like int()
+    return np.trunc(np.round(points, 6)).astype(int)
 
 
-def detect_plate_corners_hough(edges, image_shape, rho=1, theta=np.pi/180, threshold=50, min_line_length=20, max_line_gap=15, min_dist_ratio=0.3):  # noqa
+def detect_plate_corners_hough(edges, image_shape, rho=1, theta=np.pi/180, threshold=50, min_line_length=20, max_line_gap=15, min_dist_ratio=0.3, max_lines=64):  # noqa
     """
     Detects the corners of a license plate using Hough Line Transform and checks minimum distance criteria.
 
@@ -186,6 +185,7 @@ def detect_plate_corners_hough(edges, image_shape, rho=1, theta=np.pi/180, thres
         min_line_length (int): Minimum length of a line to be considered.
         max_line_gap (int): Maximum gap between segments to link them as a single line.
         min_dist_ratio (float): Minimum required distance ratio for valid corners (e.g., 0.1 means 10% of image width/height).
+        max_lines (int): Maximum number of Hough segments intersected with each other.
 
     Returns:
         numpy.ndarray or None: Array of four corner points if valid, or None if criteria are not met.  # noqa
@@ -197,31 +197,12 @@ def detect_plate_corners_hough(edges, image_shape, rho=1, theta=np.pi/180, thres
     if lines is None:
         return None
 
-    intersections = []
-    for line1, line2 in combinations(lines, 2):
-
-        p1 = (line1[0][0], line1[0][1])
-        p2 = (line1[0][2], line1[0][3])
-        p3 = (line2[0][0], line2[0][1])
-        p4 = (line2[0][2], line2[0][3])
-
-        # Check if lines intersect and calculate intersection point
-        if check_intersection(p1, p2, p3, p4):
-
-            intersection = find_intersection(p1, p2, p3, p4)
-            if intersection is None:
-                continue
-            px = intersection[0]
-            py = intersection[1]
-            intersections.append((int(px), int(py)))
-        else:
-            continue
+    points = find_segment_intersections(lines, max_lines=max_lines)
 
     # Filter valid points within the image bounds
-    intersections = [
-        (x, y) for x, y in intersections
-        if 0 <= x < image_shape[1] and 0 <= y < image_shape[0]
-    ]
+    inside = ((points[:, 0] >= 0) & (points[:, 0] < image_shape[1])
+              & (points[:, 1] >= 0) & (points[:, 1] < image_shape[0]))
+    intersections = [tuple(point) for point in points[inside].tolist()]
 
     # Check if we have at least 4 intersection points
     if len(intersections) < 4:
@@ -309,15 +290,79 @@ def cluster_and_select_corners(points, num_clusters=4, image_shape=None):
     else:
         raise ValueError("image_shape is required for clustering")
 
-    kmeans = KMeans(n_clusters=num_clusters,
-                    init=initial_centroids,
-                    n_init=1, random_state=42)
-    kmeans.fit(points)
-
-    centroids = kmeans.cluster_centers_
+    centroids = lloyd_kmeans(points, initial_centroids)
     return centroids.astype(int).tolist()
 
 
+def lloyd_kmeans(points, initial_centroids, max_iter=300, tol=1e-4):
+    """
+    Runs Lloyd's k-means from fixed initial centroids.
+
+    A small NumPy replacement for ``sklearn.cluster.KMeans(init=initial_centroids,
+    n_init=1)``, which is too heavy to build for every plate crop. It follows
+    the same steps (nearest-centroid assignment, mean update, relocation of
+    empty clusters to the farthest points, variance-scaled tolerance), so it
+    returns the same centroids.
+
+    Args:
+        points (numpy.ndarray): Points to cluster, shape (N, 2).
+        initial_centroids (numpy.ndarray): Starting centroids, shape (K, 2).
+        max_iter (int): Maximum number of iterations.
+        tol (float): Relative tolerance on the squared centroid shift.
+
+    Returns:
+        numpy.ndarray: Final centroids, shape (K, 2).
+    """
+    X = np.asarray(points, dtype=np.float64)
+    # Center the data like scikit-learn does, for accurate distances
+    X_mean = X.mean(axis=0)
+    X = X - X_mean
+    centers = np.asarray(initial_centroids, dtype=np.float64) - X_mean
+    n_clusters = len(centers)
+    tol = np.mean(np.var(X, axis=0)) * tol
+
+    labels_old = None
+    for _ in range(max_iter):
+        distances = (centers ** 2).sum(axis=1) - 2 * X @ centers.T
+        labels = np.argmin(distances, axis=1)
+
+        counts = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, X)
+
+        empty = np.where(counts == 0)[0]
+        far = ((X - centers[labels]) ** 2).sum(axis=1)
+        if len(empty) and far.max() > 0:
+            far_from_centers = np.argpartition(far, -len(empty))[:-len(empty) - 1:-1]  # noqa
+            for idx, cluster in enumerate(empty):
+                far_idx = far_from_centers[idx]
+                old_cluster = labels[far_idx]
+                sums[old_cluster] -= X[far_idx]
+                sums[cluster] = X[far_idx]
+                counts[cluster] = 1
+                counts[old_cluster] -= 1
+
+        # Clusters still empty are parked on the biggest cluster, in the
+        # same order scikit-learn averages them
+        new_centers = sums
+        biggest = np.argmax(counts)
+        for cluster in range(n_clusters):
+            if counts[cluster] > 0:
+                new_centers[cluster] *= 1.0 / counts[cluster]
+            else:
+                new_centers[cluster] = new_centers[biggest]
+        center_shift = ((new_centers - centers) ** 2).sum()
+        centers = new_centers
+
+        if labels_old is not None and np.array_equal(labels, labels_old):
+            break
+        if center_shift <= tol:
+            break
+        labels_old = labels
+
+    return centers + X_mean
+
+
 def find_plate_corners(image, bilateral=True, clahe=True, sharpening=True, enhance_edges=False):  # noqa
 
     if len(image.shape) == 3:
@@ -330,17 +375,18 @@ def find_plate_corners(image, bilateral=True, clahe=True, sharpening=True, enhan
     return plate_corners
 
 
-def calculate_homography_and_warp(image, src_points=None):
+def estimate_plate_homography(image, src_points=None):
     """
-    Calculates the homography matrix and applies a perspective transformation to rectify the plate.
+    Calculates the homography matrix that rectifies the plate of an image.
 
     Parameters:
         image (numpy.ndarray): The original image containing the distorted plate.
         src_points (numpy.ndarray): The four corner points of the detected plate in the image,
                                     in the order [top-left, top-right, bottom-right, bottom-left].
+                                    Detected automatically if not given.
 
     Returns:
-        numpy.ndarray: The perspective-corrected (rectified) image of the plate.  # noqa
+        numpy.ndarray or None: The 3x3 homography matrix, or None if the corners could not be found.  # noqa
     """
     if src_points is not None:
         src_points = np.array(src_points)
@@ -350,7 +396,7 @@ def calculate_homography_and_warp(image, src_points=None):
     if src_points is None:
         return None
 
-    # Assume a standard rectangular size for the license plate 200x100 pixels
+    # The plate is mapped onto the whole image
     width, height = image.shape[1], image.shape[0]
     dst_points = np.array([[width - 1, 0], [0, 0],
                            [0, height - 1], [width - 1, height - 1]],
@@ -358,8 +404,27 @@ def calculate_homography_and_warp(image, src_points=None):
 
     # Calculate the homography matrix
     H, _ = cv2.findHomography(src_points, np.array(order_points_clockwise(dst_points)))  # noqa
+    return H
+
+
+def calculate_homography_and_warp(image, src_points=None):
+    """
+    Calculates the homography matrix and applies a perspective transformation to rectify the plate.
+
+    Parameters:
+        image (numpy.ndarray): The original image containing the distorted plate.
+        src_points (numpy.ndarray): The four corner points of the detected plate in the image,
+                                    in the order [top-left, top-right, bottom-right, bottom-left].
+
+    Returns:
+        numpy.ndarray: The perspective-corrected (rectified) image of the plate.  # noqa
+    """
+    H = estimate_plate_homography(image, src_points)
+    if H is None:
+        return None
 
     # Apply the perspective transformation
+    width, height = image.shape[1], image.shape[0]
     rectified_plate = cv2.warpPerspective(image, H, (width, height))
 
     return rectified_plate
@@ -383,6 +448,73 @@ def opencv_resize(image, ratio):
     return cv2.resize(image, dim, interpolation=cv2.INTER_AREA)
 
 
+def letterbox(image, new_shape=(320, 640), color=(114, 114, 114)):
+    """
+    Resize an image keeping its aspect ratio and pad it to a fixed shape.
+
+    Parameters:
+    - image (np.ndarray): The input image.
+    - new_shape (tuple): Target shape as (height, width).
+    - color (tuple): Padding color.
+
+    Returns:
+    - tuple: The padded image, the scale ratio applied and the (left, top)
+      padding in pixels, so boxes can be mapped back with
+      ``(xyxy - [left, top, left, top]) / ratio``.
+    """
+    height, width = image.shape[:2]
+    ratio = min(new_shape[0] / height, new_shape[1] / width)
+    new_width = int(round(width * ratio))
+    new_height = int(round(height * ratio))
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height),
+                           interpolation=cv2.INTER_LINEAR)
+
+    pad_w = new_shape[1] - new_width
+    pad_h = new_shape[0] - new_height
+    left, top = pad_w // 2, pad_h // 2
+    image = cv2.copyMakeBorder(image, top, pad_h - top, left, pad_w - left,
+                               cv2.BORDER_CONSTANT, value=color)
+    return image, ratio, (left, top)
+
+
+def autocontrast(image, cutoff=1, dst=None):
+    """
+    Stretches the contrast of every channel, like ``PIL.ImageOps.autocontrast``.
+
+    The histogram of each channel is computed with ``cv2.calcHist``,
+    ``cutoff`` percent of the pixels are ignored at both ends, and the
+    remaining range is mapped to 0-255 with a lookup table. The result is
+    identical to PIL's, without converting the frame to a PIL image.
+
+    Parameters:
+    - image (np.ndarray): 8-bit image with one or more channels.
+    - cutoff (float): Percent of pixels cut from each end of the histogram.
+    - dst (np.ndarray, optional): Output array; may be ``image`` itself.
+
+    Returns:
+    - np.ndarray: The contrast-stretched image.
+    """
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    ramp = np.arange(256, dtype=np.float64)
+    lut = np.empty((256, channels), dtype=np.uint8)
+    for channel in range(channels):
+        hist = cv2.calcHist([image], [channel], None, [256], [0, 256]).ravel()
+        cut = int(hist.sum() * cutoff // 100)
+        # First/last levels left once ``cut`` pixels are removed at each end
+        lo = np.searchsorted(np.cumsum(hist), cut, side="right")
+        hi = 255 - np.searchsorted(np.cumsum(hist[::-1]), cut, side="right")
+        if hi <= lo:
+            lut[:, channel] = ramp
+        else:
+            scale = 255.0 / (hi - lo)
+            offset = -lo * scale
+            lut[:, channel] = np.clip((ramp * scale + offset).astype(np.int64), 0, 255)  # noqa
+    if channels == 1:
+        return cv2.LUT(image, lut[:, 0], dst=dst)
+    return cv2.LUT(image, lut.reshape(1, 256, channels), dst=dst)
+
+
 def to_img_opencv(imgPIL):
     """
     Convert a PIL image to an OpenCV image.
@@ -0,0 +1,126 @@
+# inference_scheduler.py
+"""
+Shared inference for several cameras.
+
+Each camera keeps its own ``PlateRecognizer`` (tracker, motion gate and
+homography cache), but the plate and char models are loaded once. The
+scheduler takes the latest frame of every camera and runs each model once
+per round over all of them, so an entry and an exit lane cost about the
+same as one camera plus a slightly bigger batch. ``PlateRecognizer.process``
+runs its single camera through a scheduler as well, so the stages are
+sequenced here only.
+"""
+
+from ai.models import plate_predict_args
+
+
+class InferenceScheduler:
+    """
+    Batches the frames of several cameras into the shared models.
+
+    Attributes:
+        recognizers (dict): Camera ID -> PlateRecognizer.
+        rounds (int): Rounds processed.
+        frames (int): Camera frames processed.
+        plateBatches (int): Plate model calls.
+    """
+
+    def __init__(self, recognizers, models):
+        """
+        Initialize the scheduler.
+
+        Args:
+            recognizers (dict): Camera ID -> PlateRecognizer of the camera.
+            models (callable): Returns the (modelPlate, modelCharX) pair to
+                use, once per round.
+        """
+        self.recognizers = recognizers
+        self.models = models
+        self.rounds = 0
+        self.frames = 0
+        self.plateBatches = 0
+
+    def process(self, frames, highlight=True):
+        """
+        Run the pipeline on the latest frame of each camera.
+
+        Args:
+            frames (dict): Camera ID -> BGR frame. Cameras without a new
+                frame are left out.
+            highlight (bool): Draw the detected plates on the returned frames.
+
+        Returns:
+            dict: Camera ID -> (resize, readings), as returned by
+            ``PlateRecognizer.process``.
+        """
+        self.rounds += 1
+        self.frames += len(frames)
+        modelPlate, modelCharX = self.models()
+
+        results = {}
+        prepared = {}
+        for camId, frame in frames.items():
+            recognizer = self.recognizers[camId]
+            image, detect = recognizer.prepareFrame(frame)
+            if detect:
+                prepared[camId] = image
+            else:
+                # No plate model for this camera, its tracks only age
+                results[camId] = recognizer.ageTracks(image)
+        if not prepared:
+            return results
+
+        # The cameras share the model settings, any recognizer has them
+        first = self.recognizers[next(iter(prepared))]
+
+        # One plate model call for every camera with something to look at
+        self.plateBatches += 1
+        platesResults = modelPlate(
+            list(prepared.values()),
+            **plate_predict_args(first.params, modelPlate),
+        )
+
+        tracked = {}
+        images = []
+        for camId, platesResult in zip(prepared, platesResults):
+            recognizer = self.recognizers[camId]
+            resize, plates, jobs, ended = recognizer.trackPlates(
+                prepared[camId], platesResult
+            )
+            tracked[camId] = (resize, plates, jobs, ended)
+            images.extend(
+                recognizer.rectifyPlate(croppedPlate, plate, track.id)
+                for croppedPlate, plate, track in jobs
+            )
+
+        # And one char model call for the crops of all of them
+        platesChars = first.recognizeChars(images, modelCharX)
+
+        start = 0
+        for camId, (resize, plates, jobs, ended) in tracked.items():
+            recognizer = self.recognizers[camId]
+            readings = recognizer.collectReadings(
+                jobs, platesChars[start:start + len(jobs)], ended
+            )
+            start += len(jobs)
+            if highlight:
+                # The crops are views of the frame, so draw once they are read
+                for plate in plates:
+                    recognizer.highlightPlate(resize, plate)
+            results[camId] = (resize, readings)
+        return results
+
+    def stats(self):
+        """
+        Get the scheduler counters.
+
+        Returns:
+            dict: Rounds, camera frames, plate model calls and the average
+            number of frames per round.
+        """
+        return {
+            "rounds": self.rounds,
+            "frames": self.frames,
+            "plate_batches": self.plateBatches,
+            "frames_per_round": self.frames / self.rounds if self.rounds else 0.0,  # noqa
+        }
@@ -0,0 +1,60 @@
+# manual_rectifier.py
+"""
+Fixed-point plate rectification with precomputed remap tables.
+
+With a fixed camera the plate is always seen under the same perspective,
+so the manual corner points give the same homography for every crop. The
+pixel mapping of that homography is computed once as ``cv2.remap`` tables
+and every crop is warped with a table lookup instead of a per-frame
+``cv2.findHomography`` and ``cv2.warpPerspective``.
+"""
+
+import cv2
+import numpy as np
+
+
+class ManualRectifier:
+    """
+    Warps plate crops with a homography given by fixed corner points.
+
+    Crops are first scaled to ``size``; the corner points are given in that
+    scaled crop and are mapped onto its borders.
+    """
+
+    def __init__(self, src_points, size):
+        """
+        Initialize the rectifier and build the remap tables.
+
+        Args:
+            src_points (list): Plate corners in the scaled crop, in the
+                order [top-left, top-right, bottom-right, bottom-left].
+            size (tuple): Size of the scaled and rectified crops as
+                (width, height).
+        """
+        self.size = tuple(size)
+        width, height = self.size
+        dst_points = np.array([[0, 0], [width - 1, 0],
+                               [width - 1, height - 1], [0, height - 1]],
+                              dtype=np.float32)
+        self.H = cv2.getPerspectiveTransform(
+            np.array(src_points, dtype=np.float32), dst_points
+        )
+        # With identity camera matrices and no distortion the rectification
+        # map samples each output pixel at H^-1 * pixel, as warpPerspective
+        self.map1, self.map2 = cv2.initUndistortRectifyMap(
+            np.eye(3), None, self.H, np.eye(3), self.size, cv2.CV_16SC2
+        )
+
+    def warp(self, image):
+        """
+        Rectify a plate crop.
+
+        Args:
+            image (numpy.ndarray): Plate crop of any size.
+
+        Returns:
+            numpy.ndarray: The rectified crop, of size ``self.size``.
+        """
+        if (image.shape[1], image.shape[0]) != self.size:
+            image = cv2.resize(image, self.size, interpolation=cv2.INTER_LINEAR)  # noqa
+        return cv2.remap(image, self.map1, self.map2, cv2.INTER_LINEAR)
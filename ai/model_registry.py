@@ -0,0 +1,132 @@
+# model_registry.py
+"""
+The models in use, with background loading and swapping.
+
+Loading and warming a pair of YOLO models takes seconds. The registry does
+it on its own thread while the pipeline keeps running on the current pair,
+then swaps the new pair in with a single reference assignment. The
+pipeline fetches the pair once per frame, so a frame is processed entirely
+by the old models or entirely by the new ones.
+"""
+
+import threading
+
+from ai.models import free_memory, get_device, load_models, warmup_models
+from helper.startup_timer import PhaseTimer
+
+
+class ModelRegistry:
+    """
+    Holds the current (modelPlate, modelCharX) pair.
+
+    Attributes:
+        on_ready (callable): Optional callback receiving the plate and char
+            weights paths once they are in use. It is called on the loader
+            thread, so GUI code should pass a Qt signal's ``emit``.
+        on_error (callable): Optional callback receiving the error message
+            of a failed load, also on the loader thread.
+        device (torch.device): Device the models run on, chosen on the
+            first load.
+        paths (tuple): Weights of the models in use, or None.
+    """
+
+    def __init__(self, params):
+        """
+        Initialize an empty registry.
+
+        Args:
+            params (Parameters): Pipeline settings, used for the warmup.
+        """
+        self.params = params
+        self.on_ready = None
+        self.on_error = None
+        self.device = None
+        self.paths = None
+        self.models = (None, None)
+        self.lock = threading.Lock()
+        self.requested = 0
+        self.releasePending = False
+
+    def current(self):
+        """
+        Get the models to run the next frame with.
+
+        Called by the pipeline once per frame. The previous frame is done
+        with its models by then, so replaced models are released here.
+
+        Returns:
+            tuple: (modelPlate, modelCharX), (None, None) before the first
+            load finished.
+        """
+        if self.releasePending:
+            self.releasePending = False
+            free_memory()
+        return self.models
+
+    def ready(self):
+        """Return True once a pair of models is in use."""
+        return self.models[0] is not None
+
+    def load(self, plate_path, char_path):
+        """
+        Load and warm up a pair of models in the background, then swap
+        them in. A newer request supersedes any load still in progress.
+
+        Args:
+            plate_path (str): Weights of the plate detector.
+            char_path (str): Weights of the char detector.
+
+        Returns:
+            threading.Thread: The loader thread.
+        """
+        with self.lock:
+            self.requested += 1
+            request = self.requested
+        thread = threading.Thread(
+            target=self._load, args=(request, plate_path, char_path),
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _load(self, request, plate_path, char_path):
+        timer = PhaseTimer("models")
+        try:
+            if self.device is None:
+                import torch  # noqa: F401
+                timer.phase("import torch")
+                import ultralytics  # noqa: F401
+                timer.phase("import ultralytics")
+                self.device = get_device(self.params.model_backend)
+                timer.phase("select device")
+            models = load_models(
+                plate_path, char_path, self.device,
+                self.params.model_backend, self.params.char_int8,
+            )
+            timer.phase("load models")
+            warmup_models(*models, self.params)
+            timer.phase("warm up models")
+        except Exception as e:
+            print("Error loading the model")
+            print("Error description: ", e)
+            if self.on_error is not None:
+                self.on_error(str(e))
+            return
+
+        with self.lock:
+            if request != self.requested:
+                # Superseded while loading, the newer request wins
+                del models
+                free_memory()
+                return
+            # One assignment, so a frame sees either pair but never a mix
+            self.models = models
+            self.paths = (plate_path, char_path)
+            del models
+            self.releasePending = True
+        # Frees the old pair now if no frame is running, otherwise the
+        # next current() call does
+        free_memory()
+        timer.total()
+        if self.on_ready is not None:
+            self.on_ready(plate_path, char_path)
@@ -0,0 +1,271 @@
+# models.py
+"""
+Loading of the plate and char YOLO models, shared by the GUI and the
+headless tools.
+
+torch and ultralytics take seconds to import, so they are only imported
+inside these functions; importing this module is cheap.
+
+Besides the PyTorch ``.pt`` weights, the models can run from ONNX or
+OpenVINO exports of them (see ``export_models.py``), which are much faster
+on machines without a GPU. ultralytics runs every format behind the same
+``YOLO`` interface, so the rest of the pipeline does not change.
+"""
+
+import gc
+import os
+
+import numpy as np
+
+# Backends of [MODELCONFIG] device that run exported models
+EXPORT_FORMATS = ("onnx", "openvino")
+
+
+def get_device(backend="gpu"):
+    """
+    Determines the device to run the PyTorch models on.
+    Returns a torch.device object representing the device (CUDA, MPS, or CPU).
+    Only the "gpu" backend looks for an accelerator; the others run on CPU.
+    """
+    import torch
+
+    if backend != "gpu":
+        print(f"{backend} backend runs on cpu")
+        return torch.device("cpu")
+    if torch.cuda.is_available():
+        print("cuda is available")
+        return torch.device("cuda")
+    elif torch.backends.mps.is_available():
+        print("mps is available")
+        return torch.device("mps")
+    else:
+        print("cpu is available")
+        return torch.device("cpu")
+
+
+def register_safe_globals():
+    """
+    Allow the ultralytics layer classes in ``torch.load``, which only
+    unpickles allow-listed classes since PyTorch 2.6.
+    """
+    import torch
+    import torch.serialization
+    from torch import nn
+    from torch.nn import BatchNorm2d, Conv2d, Upsample
+    from torch.nn.modules.activation import SiLU
+    from torch.nn.modules.container import ModuleList
+    from torch.nn.modules.linear import Identity
+    from torch.nn.modules.pooling import MaxPool2d
+    from ultralytics.nn.modules.block import C2f, SPPF, Bottleneck, DFL, RepNCSPELAN4, RepCSP, RepBottleneck, ADown, SPPELAN, C3k2  # noqa
+    from ultralytics.nn.modules.conv import Conv, Concat, DWConv, RepConv
+    from ultralytics.nn.modules.head import Detect
+    from ultralytics.nn.tasks import DetectionModel
+
+    torch.serialization.add_safe_globals([
+        nn.Sequential,
+        DetectionModel,
+        Conv,
+        Conv2d,
+        C2f,
+        SPPF,
+        Upsample,
+        Concat,
+        Detect,
+        BatchNorm2d,
+        Bottleneck,
+        MaxPool2d,
+        DWConv,
+        DFL,
+        RepNCSPELAN4,
+        RepCSP,
+        RepBottleneck,
+        RepConv,
+        Identity,
+        ADown,
+        SPPELAN,
+        C3k2
+    ])
+    torch.serialization.add_safe_globals([SiLU, ModuleList])
+
+
+def exported_path(weights, fmt, int8=False):
+    """
+    Get where ultralytics exports a ``.pt`` file to.
+
+    Args:
+        weights (str): PyTorch weights, e.g. ./model/best_chars_try1.pt.
+        fmt (str): "onnx" or "openvino".
+        int8 (bool): Path of the INT8 model written by
+            quantize_char_model.py instead.
+
+    Returns:
+        str: The .onnx file, or the OpenVINO model folder.
+    """
+    root = os.path.splitext(weights)[0]
+    if int8:
+        root += "_int8"
+    if fmt == "onnx":
+        return root + ".onnx"
+    return root + "_openvino_model"
+
+
+def load_model(weights, device, backend="gpu", int8=False):
+    """
+    Load one model for a backend.
+
+    Args:
+        weights (str): PyTorch weights of the model.
+        device (torch.device): Device PyTorch models run on.
+        backend (str): One of configParams.MODEL_BACKENDS. For "onnx" and
+            "openvino" the export of ``weights`` is loaded; without one
+            the PyTorch weights are used.
+        int8 (bool): Prefer the INT8 export, for "onnx" and "openvino".
+
+    Returns:
+        YOLO: The model.
+    """
+    from ultralytics import YOLO
+
+    if backend in EXPORT_FORMATS and int8:
+        quantized = exported_path(weights, backend, int8=True)
+        if os.path.exists(quantized):
+            print(f"Model used: {quantized}")
+            return YOLO(quantized, task="detect", verbose=False)
+        print(f"No INT8 {backend} model of {weights}, run quantize_char_model.py")  # noqa
+
+    if backend in EXPORT_FORMATS:
+        exported = exported_path(weights, backend)
+        if os.path.exists(exported):
+            print(f"Model used: {exported}")
+            return YOLO(exported, task="detect", verbose=False)
+        print(f"No {backend} export of {weights}, run export_models.py; using PyTorch")  # noqa
+
+    register_safe_globals()
+    print(f"Model used: {weights}")
+    return YOLO(weights, verbose=False).to(device)
+
+
+def load_models(plate_path, char_path, device, backend="gpu", char_int8=False):  # noqa
+    """
+    Load the plate and char models.
+
+    Args:
+        plate_path (str): Weights of the plate detector.
+        char_path (str): Weights of the char detector.
+        device (torch.device): Device the models run on.
+        backend (str): One of configParams.MODEL_BACKENDS.
+        char_int8 (bool): Use the INT8 char model of the backend.
+
+    Returns:
+        tuple: (modelPlate, modelCharX).
+    """
+    modelPlate = load_model(plate_path, device, backend)
+    modelCharX = load_model(char_path, device, backend, int8=char_int8)
+    print("Models loaded successfully")
+    return modelPlate, modelCharX
+
+
+def export_model(weights, fmt, imgsz):
+    """
+    Export PyTorch weights to ONNX or OpenVINO next to them.
+
+    The export has a dynamic batch and input size, so the char model still
+    takes every crop of a frame in one call.
+
+    Args:
+        weights (str): PyTorch weights of the model.
+        fmt (str): "onnx" or "openvino".
+        imgsz (int or list): Inference size the model is used at.
+
+    Returns:
+        str: Path of the export.
+    """
+    from ultralytics import YOLO
+
+    register_safe_globals()
+    return YOLO(weights, verbose=False).export(
+        format=fmt, imgsz=imgsz, dynamic=True, half=False
+    )
+
+
+def _on_cuda(model):
+    # Exported models have no torch device
+    return getattr(getattr(model, "device", None), "type", None) == "cuda"
+
+
+def plate_predict_args(params, model):
+    """
+    Keyword arguments of every plate model call.
+
+    Args:
+        params (Parameters): Pipeline settings.
+        model (YOLO): The plate model, to check its device.
+
+    Returns:
+        dict: Pinned image size, thresholds and precision.
+    """
+    return {
+        "imgsz": params.imgsz,
+        "conf": params.conf_thres,
+        "max_det": params.max_det,
+        "half": params.half and _on_cuda(model),
+        "verbose": False,
+        "show": False,
+    }
+
+
+def char_predict_args(params, model):
+    """
+    Keyword arguments of every char model call.
+
+    The crops are letterboxed to ``params.char_batch_shape``, so that is
+    also the inference size and the model never rescales them.
+
+    Args:
+        params (Parameters): Pipeline settings.
+        model (YOLO): The char model, to check its device.
+
+    Returns:
+        dict: Pinned image size, thresholds and precision.
+    """
+    return {
+        "imgsz": list(params.char_batch_shape),
+        "conf": params.conf_thres,
+        "max_det": params.max_det,
+        "half": params.half and _on_cuda(model),
+        "verbose": False,
+        "show": False,
+        "save": False,
+    }
+
+
+def warmup_models(modelPlate, modelCharX, params, frameSize=(960, 540), runs=2):  # noqa
+    """
+    Run the models on blank inputs of the shapes the pipeline feeds them.
+
+    The first call of a model sets up the predictor and picks the kernels
+    and memory for its input shape; warming up right after loading keeps
+    that cost off the first vehicle.
+
+    Args:
+        modelPlate (YOLO): The plate model.
+        modelCharX (YOLO): The char model.
+        params (Parameters): Pipeline settings.
+        frameSize (tuple): Size frames are resized to, as (width, height).
+        runs (int): Calls per model.
+    """
+    width, height = frameSize
+    frame = np.zeros((height, width, 3), np.uint8)
+    crop = np.zeros((*params.char_batch_shape, 3), np.uint8)
+    for _ in range(runs):
+        modelPlate(frame, **plate_predict_args(params, modelPlate))
+        modelCharX([crop], **char_predict_args(params, modelCharX))
+
+
+def free_memory():
+    """Collect released models and return cached GPU memory to the driver."""
+    import torch
+
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
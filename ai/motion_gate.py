@@ -0,0 +1,110 @@
+# motion_gate.py
+"""
+Cheap motion detection that decides whether a frame needs the plate model.
+
+The gate is empty most of the time, and running the plate detector on an
+empty gate only burns CPU/GPU. The gate compares a small grayscale copy of
+each frame against a running background average, only inside the region
+of interest, and lets the frame through when enough pixels changed.
+"""
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Frame differencing against a running background inside an ROI polygon.
+
+    Attributes:
+        checked (int): Frames checked.
+        skipped (int): Frames without motion.
+    """
+
+    def __init__(self, roi=None, width=160, threshold=25, min_area=0.002,
+                 hold=15, learning_rate=0.05):
+        """
+        Initialize the gate.
+
+        Args:
+            roi (list of tuple): Polygon in 0-1 frame coordinates, or None
+                for the whole frame.
+            width (int): Width frames are downscaled to before comparing.
+            threshold (int): Gray level change that counts as motion.
+            min_area (float): Fraction of ROI pixels that must change.
+            hold (int): Frames let through after the last motion, so a car
+                that stops at the barrier is still looked at.
+            learning_rate (float): Weight of each frame in the background.
+        """
+        self.roi = roi
+        self.width = width
+        self.threshold = threshold
+        self.min_area = min_area
+        self.hold = hold
+        self.learning_rate = learning_rate
+        self.background = None
+        self.mask = None
+        self.roiPixels = 0
+        self.holdLeft = 0
+        self.checked = 0
+        self.skipped = 0
+
+    def _reset(self, gray):
+        self.background = gray.astype(np.float32)
+        height, width = gray.shape
+        self.mask = np.zeros((height, width), np.uint8)
+        if self.roi is None:
+            self.mask[:] = 255
+        else:
+            polygon = np.array([(x * width, y * height) for x, y in self.roi])
+            cv2.fillPoly(self.mask, [polygon.round().astype(np.int32)], 255)
+        self.roiPixels = max(cv2.countNonZero(self.mask), 1)
+        self.holdLeft = self.hold
+
+    def check(self, frame):
+        """
+        Check a frame for motion and update the background with it.
+
+        Args:
+            frame (numpy.ndarray): BGR frame, any size.
+
+        Returns:
+            bool: True if the frame should go through the plate model.
+        """
+        self.checked += 1
+        height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY),
+                                (5, 5), 0)
+
+        if self.background is None or self.background.shape != gray.shape:
+            self._reset(gray)
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        _, moving = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+        changed = cv2.countNonZero(cv2.bitwise_and(moving, self.mask))
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        if changed >= self.min_area * self.roiPixels:
+            self.holdLeft = self.hold
+            return True
+        if self.holdLeft > 0:
+            self.holdLeft -= 1
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self):
+        """
+        Get the gate counters.
+
+        Returns:
+            dict: Checked and skipped frames and the skip ratio.
+        """
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / self.checked if self.checked else 0.0,
+        }
@@ -0,0 +1,93 @@
+# plate_consensus.py
+"""
+Per-character voting over the readings of one plate passage.
+
+A single frame's reading can have one wrong character that a later frame
+gets right. Instead of committing the first confident reading, the
+consensus keeps, for every character position, the summed confidence of
+each character read there, and builds the plate text from the best
+character of every position. A reading is final once it stops changing,
+or when the vehicle leaves.
+"""
+
+
+class PlateConsensus:
+    """
+    Confidence-weighted character votes for one plate.
+
+    Attributes:
+        readings (int): Readings added so far.
+        stableFor (int): Consecutive readings that left the result unchanged.
+    """
+
+    def __init__(self):
+        # Plate length -> number of readings of that length
+        self.lengths = {}
+        # Plate length -> one {char: summed confidence} dict per position
+        self.votes = {}
+        self.readings = 0
+        self.stableFor = 0
+        self.lastText = ""
+
+    def add(self, plateText, confidences):
+        """
+        Add the reading of one frame.
+
+        Args:
+            plateText (str): Plate text read on the frame.
+            confidences (iterable of float): Confidence of each character,
+                in the model's 0-1 scale.
+        """
+        if not plateText:
+            return
+        length = len(plateText)
+        positions = self.votes.setdefault(length, [{} for _ in range(length)])
+        for position, char, confidence in zip(positions, plateText, confidences):  # noqa
+            position[char] = position.get(char, 0.0) + float(confidence)
+        self.lengths[length] = self.lengths.get(length, 0) + 1
+        self.readings += 1
+
+        plateText, _ = self.result()
+        if plateText == self.lastText:
+            self.stableFor += 1
+        else:
+            self.stableFor = 1
+            self.lastText = plateText
+
+    def result(self):
+        """
+        Get the consensus reading.
+
+        The plate length read most often wins; every position takes the
+        character with the highest summed confidence. The confidence of a
+        position is that sum over the readings of the winning length, so
+        disagreeing readings lower it.
+
+        Returns:
+            tuple: (plateText, charConfAvg) with charConfAvg in 0-100, or
+            ("", 0) if nothing was read yet.
+        """
+        if not self.lengths:
+            return "", 0
+        length = max(self.lengths, key=self.lengths.get)
+        count = self.lengths[length]
+        chars, confidences = [], []
+        for position in self.votes[length]:
+            char = max(position, key=position.get)
+            chars.append(char)
+            confidences.append(position[char] / count)
+        return "".join(chars), round(sum(confidences) / length * 100)
+
+    def isStable(self, min_readings=3, min_confidence=70):
+        """
+        Check whether the consensus can be reported before the plate leaves.
+
+        Args:
+            min_readings (int): Readings in a row the result must survive.
+            min_confidence (int): Minimum consensus confidence, 0-100.
+
+        Returns:
+            bool: True if the result is settled.
+        """
+        return (self.stableFor >= min_readings
+                and self.result()[1] >= min_confidence)
@@ -0,0 +1,242 @@
+# plate_tracker.py
+"""
+SORT-style tracking of plate boxes across frames.
+
+A car at the barrier shows the same plate for dozens of frames, and running
+the char model on every one of them mostly repeats the same reading. The
+tracker links each frame's plate boxes to the boxes of the previous frames
+by IoU, so the char model only runs when a track is new, every few frames,
+or when a clearly better view of the plate shows up. The readings of a
+track are fused by per-character confidence voting.
+"""
+
+import itertools
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from ai.detections import boxes_of
+from ai.plate_consensus import PlateConsensus
+
+
+def iou_matrix(boxes, other):
+    """
+    Compute the intersection over union of every pair of boxes.
+
+    Parameters:
+    - boxes (np.ndarray): (N, 4) boxes as [xmin, ymin, xmax, ymax].
+    - other (np.ndarray): (M, 4) boxes, same format.
+
+    Returns:
+    - np.ndarray: (N, M) IoU values.
+    """
+    boxes = boxes[:, None, :]
+    other = other[None, :, :]
+    width = np.minimum(boxes[..., 2], other[..., 2]) - np.maximum(boxes[..., 0], other[..., 0])  # noqa
+    height = np.minimum(boxes[..., 3], other[..., 3]) - np.maximum(boxes[..., 1], other[..., 1])  # noqa
+    intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+    area = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+    otherArea = (other[..., 2] - other[..., 0]) * (other[..., 3] - other[..., 1])  # noqa
+    return intersection / np.maximum(area + otherArea - intersection, 1e-9)
+
+
+class PlateTrack:
+    """
+    One plate followed across frames.
+
+    Attributes:
+        id (int): Track ID, unique for the tracker's lifetime.
+        box (np.ndarray): Last box as [xmin, ymin, xmax, ymax].
+        hits (int): Frames the plate was detected in.
+        missed (int): Consecutive frames without a matching detection.
+        quality (float): Best crop quality recognized so far.
+        lastRecognition (int): Frame of the last char recognition, or None.
+        consensus (PlateConsensus): Character votes of the track's readings.
+        charDetected (np.ndarray): Char records of the last reading.
+        bestCrop (np.ndarray): Copy of the best quality crop recognized.
+        bestPlate (np.void): Plate detection of ``bestCrop``.
+        reported (bool): Whether the consensus reading was already emitted.
+    """
+
+    def __init__(self, track_id, box, frame):
+        self.id = track_id
+        self.box = box
+        self.hits = 1
+        self.missed = 0
+        self.firstFrame = frame
+        self.quality = 0.0
+        self.lastRecognition = None
+        self.consensus = PlateConsensus()
+        self.charDetected = None
+        self.bestCrop = None
+        self.bestPlate = None
+        self.reported = False
+
+    def addReading(self, plateText, charDetected):
+        """
+        Add a char model reading to the track's consensus.
+
+        Args:
+            plateText (str): Recognized plate text, one char per record.
+            charDetected (np.ndarray): Char records of the reading, left to
+                right.
+        """
+        self.charDetected = charDetected
+        self.consensus.add(plateText, charDetected["confidence"])
+
+    def reading(self):
+        """
+        Get the consensus reading of the track.
+
+        Returns:
+            tuple: (plateText, charConfAvg), or ("", 0) if nothing was read.
+        """
+        return self.consensus.result()
+
+
+class PlateTracker:
+    """
+    Associates plate detections with tracks and decides when to read them.
+
+    Attributes:
+        tracks (list of PlateTrack): Live tracks.
+        recognized (int): Crops sent to the char model.
+        skipped (int): Crops whose recognition was skipped.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=15, recognize_every=10,
+                 quality_gain=1.2):
+        """
+        Initialize the tracker.
+
+        Args:
+            iou_threshold (float): Minimum IoU to link a box to a track.
+            max_missed (int): Frames a track survives without detections.
+            recognize_every (int): Frames between readings of a track.
+            quality_gain (float): Factor by which the crop quality must
+                beat the best recognized one to trigger an extra reading.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.recognize_every = recognize_every
+        self.quality_gain = quality_gain
+        self.tracks = []
+        self.frame = 0
+        self.ids = itertools.count(1)
+        self.recognized = 0
+        self.skipped = 0
+
+    def update(self, plates):
+        """
+        Link a frame's plate detections to tracks.
+
+        Args:
+            plates (np.ndarray): Plate record array of the frame.
+
+        Returns:
+            tuple: (tracks, ended) where ``tracks`` holds the PlateTrack of
+            each detection, in order, and ``ended`` the tracks that were
+            dropped on this frame.
+        """
+        self.frame += 1
+        boxes = boxes_of(plates).astype(np.float64).reshape(-1, 4)
+        assigned = [None] * len(boxes)
+
+        if len(boxes) and self.tracks:
+            trackBoxes = np.array([track.box for track in self.tracks])
+            iou = iou_matrix(boxes, trackBoxes)
+            rows, cols = linear_sum_assignment(-iou)
+            for row, col in zip(rows, cols):
+                if iou[row, col] >= self.iou_threshold:
+                    track = self.tracks[col]
+                    track.box = boxes[row]
+                    track.hits += 1
+                    track.missed = 0
+                    assigned[row] = track
+
+        matched = {id(track) for track in assigned if track is not None}
+        for track in self.tracks:
+            if id(track) not in matched:
+                track.missed += 1
+        ended = [track for track in self.tracks
+                 if track.missed > self.max_missed]
+        self.tracks = [track for track in self.tracks
+                       if track.missed <= self.max_missed]
+
+        for row, box in enumerate(boxes):
+            if assigned[row] is None:
+                track = PlateTrack(next(self.ids), box, self.frame)
+                self.tracks.append(track)
+                assigned[row] = track
+        return assigned, ended
+
+    def flush(self):
+        """
+        End every live track, e.g. when the capture stops.
+
+        Returns:
+            list of PlateTrack: The tracks that were live.
+        """
+        ended, self.tracks = self.tracks, []
+        return ended
+
+    def needsRecognition(self, track, quality):
+        """
+        Decide whether a track's crop should go through the char model.
+
+        The track is read when it is new, when ``recognize_every`` frames
+        passed since its last reading, or when the crop quality beats the
+        best one read so far by ``quality_gain``. A track already reported
+        is never read again, its passage is registered.
+
+        Args:
+            track (PlateTrack): The track of the crop.
+            quality (float): Quality score of the crop.
+
+        Returns:
+            bool: True if the crop should be recognized.
+        """
+        if track.reported:
+            self.skipped += 1
+            return False
+        if (
+            track.lastRecognition is None
+            or self.frame - track.lastRecognition >= self.recognize_every
+            or quality > track.quality * self.quality_gain
+        ):
+            track.lastRecognition = self.frame
+            track.quality = max(track.quality, quality)
+            self.recognized += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self):
+        """
+        Get the tracker counters.
+
+        Returns:
+            dict: Recognized and skipped crops, and live tracks.
+        """
+        return {
+            "recognized": self.recognized,
+            "skipped": self.skipped,
+            "tracks": len(self.tracks),
+        }
+
+
+def crop_quality(plate):
+    """
+    Score how readable a plate crop is likely to be.
+
+    Bigger plates and more confident detections read better, so the score
+    is the box area weighted by the plate confidence.
+
+    Parameters:
+    - plate (np.void): Plate detection record.
+
+    Returns:
+    - float: The quality score.
+    """
+    area = (plate["xmax"] - plate["xmin"]) * (plate["ymax"] - plate["ymin"])
+    return float(area * plate["confidence"])
@@ -0,0 +1,415 @@
+# recognition.py
+"""
+The plate recognition pipeline, independent of the GUI.
+
+``PlateRecognizer`` turns camera frames into plate readings: contrast
+stretch, motion gating, plate detection, tracking, rectification, batched
+char recognition and per-track consensus. The Qt worker of the main window
+and the headless batch tool both drive it frame by frame and only differ
+in where frames come from and where readings go.
+"""
+
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from ai.detections import boxes_of, filter_by_confidence, make_detections
+from ai.homography_cache import HomographyCache
+from ai.img_model import autocontrast, calculate_homography_and_warp, letterbox  # noqa
+from ai.inference_scheduler import InferenceScheduler
+from ai.manual_rectifier import ManualRectifier
+from ai.models import char_predict_args
+from ai.motion_gate import MotionGate
+from ai.plate_tracker import PlateTracker, crop_quality
+
+# A reported plate passage. croppedPlate is the best RGB crop of the track
+# and plate its detection record.
+PlateReading = namedtuple(
+    "PlateReading",
+    ["croppedPlate", "plate", "plateText", "charDetected", "charConfAvg",
+     "trackId"],
+)
+
+
+def is_valid_reading(plateText, charConfAvg, min_confidence=70):
+    """
+    Check whether a reading looks like a complete plate worth registering.
+
+    Parameters:
+    - plateText (str): Plate text, three letters and three digits.
+    - charConfAvg (int): Char confidence, 0-100.
+    - min_confidence (int): Minimum char confidence.
+
+    Returns:
+    - bool: True if the reading can be registered.
+    """
+    return (len(plateText) == 6 and charConfAvg >= min_confidence
+            and plateText[-3:].isdigit())
+
+
+class PlateRecognizer:
+    """
+    Frame-by-frame plate recognition for one camera.
+
+    Attributes:
+        frameSize (tuple): Size frames are resized to, as (width, height).
+        detectorCalls (int): Frames that went through the plate model.
+        detectorSkipped (int): Frames without motion, where the plate model
+            was skipped and the tracks only aged.
+    """
+
+    def __init__(self, params, models, frameSize=(960, 540)):
+        """
+        Initialize the recognizer.
+
+        Args:
+            params (Parameters): Pipeline settings.
+            models (callable): Returns the (modelPlate, modelCharX) pair to
+                use. It is called once per frame, so models swapped in
+                between frames are picked up on the next one.
+            frameSize (tuple): Size frames are resized to before detection.
+        """
+        self.params = params
+        self.models = models
+        self.frameSize = frameSize
+        # Fixed-camera warp, remap tables built once
+        batchHeight, batchWidth = params.char_batch_shape
+        self.manualRectifier = ManualRectifier(
+            params.src_points_manual, (batchWidth, batchHeight)
+        )
+        # A single camera is a round of one, so both share the stages
+        self.scheduler = InferenceScheduler({None: self}, models)
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the tracked plates, their homographies and the motion
+        background.
+        """
+        params = self.params
+        self.detectorCalls = 0
+        self.detectorSkipped = 0
+        # Plates are tracked across frames to skip redundant char readings
+        self.tracker = PlateTracker(
+            iou_threshold=params.tracker_iou_threshold,
+            max_missed=params.tracker_max_missed,
+            recognize_every=params.tracker_recognize_every,
+            quality_gain=params.tracker_quality_gain,
+        )
+        # Plate homographies reused while the plate stays put. They are keyed
+        # by track ID and the new tracker numbers its tracks from 1 again
+        self.homographyCache = HomographyCache(
+            tolerance=params.homography_cache_tolerance
+        )
+
+        self.motionGate = None
+        if params.motion_enabled:
+            self.motionGate = MotionGate(
+                roi=params.motion_roi,
+                threshold=params.motion_threshold,
+                min_area=params.motion_min_area,
+                hold=params.motion_hold,
+            )
+
+    def process(self, frame, highlight=True):
+        """
+        Run the pipeline on one frame.
+
+        Args:
+            frame (numpy.ndarray): BGR camera frame.
+            highlight (bool): Draw the detected plates on the returned frame.
+
+        Returns:
+            tuple: (resize, readings) with the resized RGB frame and the
+            list of PlateReading reported on this frame.
+        """
+        return self.scheduler.process({None: frame}, highlight)[None]
+
+    def prepareFrame(self, frame):
+        """
+        Resize and contrast-stretch a frame and check it for motion.
+
+        Args:
+            frame (numpy.ndarray): BGR camera frame.
+
+        Returns:
+            tuple: (prepared, detect) with the BGR frame the plate model
+            expects, and whether the plate model should run on it.
+        """
+        # The background is updated on every frame; with no motion the
+        # plate model is skipped
+        motion = self.motionGate is None or self.motionGate.check(frame)
+        if motion:
+            self.detectorCalls += 1
+        else:
+            self.detectorSkipped += 1
+        prepared = self.prepareImage(frame)
+        return prepared, motion
+
+    def ageTracks(self, prepared):
+        """
+        Count a frame skipped by the motion gate as a miss for every track.
+
+        A still frame has no plate moving in or out, so the tracks age as if
+        nothing was detected, and those that end are reported like on any
+        other frame.
+
+        Args:
+            prepared (numpy.ndarray): Frame returned by ``prepareFrame``.
+
+        Returns:
+            tuple: (resize, readings) like ``process``.
+        """
+        resize = cv2.cvtColor(prepared, cv2.COLOR_BGR2RGB)
+        _, ended = self.tracker.update(
+            make_detections(np.empty((0, 4)), np.empty(0))
+        )
+        return resize, self.collectReadings([], [], ended)
+
+    def trackPlates(self, prepared, platesResult):
+        """
+        Track the detected plates and pick the crops to recognize.
+
+        Args:
+            prepared (numpy.ndarray): Frame returned by ``prepareFrame``.
+            platesResult: Plate model result for the frame.
+
+        Returns:
+            tuple: (resize, plates, jobs, ended) with the RGB frame, the
+            plate detections, a list of (croppedPlate, plate, track) to
+            recognize and the tracks that ended on this frame.
+        """
+        # The frame's only color conversion; crops and view are RGB
+        resize = cv2.cvtColor(prepared, cv2.COLOR_BGR2RGB)
+
+        # Coords [xmin, ymin, xmax, ymax]
+        xyxy = platesResult.boxes.xyxy.cpu().numpy()
+        confidence = platesResult.boxes.conf.cpu().numpy()  # Confidence score
+
+        plate_th = 0.60
+        plates = filter_by_confidence(make_detections(xyxy, confidence), plate_th)  # noqa
+        croppedPlates = [self.cropPlate(resize, plate) for plate in plates]
+        tracks, ended = self.tracker.update(plates)
+
+        # Only new tracks, stale readings or better views go to the char
+        # model
+        jobs = []
+        for croppedPlate, plate, track in zip(croppedPlates, plates, tracks):
+            quality = crop_quality(plate)
+            if self.tracker.needsRecognition(track, quality):
+                jobs.append((croppedPlate, plate, track))
+                if quality >= track.quality:
+                    track.bestCrop = croppedPlate.copy()
+                    track.bestPlate = plate
+        return resize, plates, jobs, ended
+
+    def collectReadings(self, jobs, platesChars, ended):
+        """
+        Add the char readings to their tracks and collect the reports.
+
+        Args:
+            jobs (list): Jobs returned by ``trackPlates``.
+            platesChars (list): Char readings of the jobs, in order.
+            ended (list of PlateTrack): Tracks that ended on the frame.
+
+        Returns:
+            list of PlateReading: Readings reported on this frame.
+        """
+        readings = []
+        for (_, _, track), plateChars in zip(jobs, platesChars):
+            plateText, char_detected, _ = plateChars
+            track.addReading(self.correctPlateText(plateText), char_detected)
+            # A passage is reported once, as soon as its reading settles on
+            # a valid plate; otherwise it keeps being read until it ends
+            if (
+                not track.reported
+                and track.consensus.isStable(
+                    self.params.consensus_stable_readings,
+                    self.params.consensus_min_confidence,
+                )
+                and is_valid_reading(*track.reading())
+            ):
+                readings.append(self.reportTrack(track))
+        # Or when the vehicle leaves
+        readings.extend(self.reportTrack(track) for track in ended)
+        return [reading for reading in readings if reading]
+
+    def flush(self):
+        """
+        End every tracked plate, e.g. when the source ends.
+
+        Returns:
+            list of PlateReading: Readings of the plates not reported yet.
+        """
+        readings = [self.reportTrack(track) for track in self.tracker.flush()]
+        return [reading for reading in readings if reading]
+
+    def reportTrack(self, track):
+        if track.reported or track.bestCrop is None:
+            return None
+        plateText, charConfAvg = track.reading()
+        if not plateText:
+            return None
+        track.reported = True
+        # print("Plate detected: ", plateText)
+        return PlateReading(
+            track.bestCrop,
+            track.bestPlate,
+            plateText,
+            track.charDetected,
+            charConfAvg,
+            track.id,
+        )
+
+    def correctPlateText(self, plateText: str):
+
+        text = plateText[:3]
+        wrongText = ["0", "1", "6", "8"]
+        for char in text:
+            if char in wrongText:
+                text = text.replace(char, self.params.rectification_text_dict[char])  # noqa
+        nums = plateText[3:]
+        wrongNums = ["O", "I", "G", "B"]
+        for num in nums:
+            if num in wrongNums:
+                nums = nums.replace(num, self.params.rectification_nums_dict[num])  # noqa
+
+        correctedPlateText = "".join([text, nums])
+        return correctedPlateText
+
+    def prepareImage(self, frame):
+        resize = cv2.resize(frame, self.frameSize)
+        # Contrast stretched in place, the frame stays BGR
+        return autocontrast(resize, cutoff=1, dst=resize)
+
+    def highlightPlate(self, resize, plate):
+        moreSpace = 3
+        cv2.rectangle(
+            resize,
+            (int(plate["xmin"]) - moreSpace, int(plate["ymin"]) - moreSpace),
+            (int(plate["xmax"]) + moreSpace, int(plate["ymax"]) + moreSpace),
+            color=(0, 0, 255),
+            thickness=3,
+        )
+
+    def cropPlate(self, resize, plate):
+        y1 = plate["ymin"]
+        y2 = plate["ymax"]
+        x1 = plate["xmin"]
+        x2 = plate["xmax"]
+        factor = 0.25
+        more_width = int((x2-x1)*factor)
+        more_height = int((y2-y1)*factor*2)
+        if x1-more_width < 0 or x2+more_width > resize.shape[1]:
+            more_width = 0
+        if y1-more_height < 0 or y2+more_height > resize.shape[0]:
+            more_height = 0
+
+        # print("Added width: ", more_width*2)
+        # print("Added height: ", more_height*2)
+        return resize[int(y1-more_height): int(y2+more_height),
+                      int(x1-more_width): int(x2+more_width)]
+
+    def rectifyPlate(self, croppedPlate, plate=None, track_id=None):
+        strategy = self.params.rectification_strategy
+        if strategy == "off":
+            return croppedPlate
+        if strategy == "manual":
+            return self.manualRectifier.warp(croppedPlate)
+
+        if plate is not None:
+            rectified = self.homographyCache.warp(
+                croppedPlate, boxes_of(plate), track_id
+            )
+        else:
+            rectified = calculate_homography_and_warp(croppedPlate)
+        if rectified is not None:
+            return rectified
+        if strategy == "auto_manual":
+            return self.manualRectifier.warp(croppedPlate)
+        return croppedPlate
+
+    def recognizeChars(self, images, modelCharX):
+        """
+        Run the char model once on a list of (rectified) plate images.
+
+        Returns a list with one (plateText, char_detected, charConfAvg) tuple
+        per image, in the same order.
+        """
+        if not images:
+            return []
+        batch, letterboxes = [], []
+        for image in images:
+            image, ratio, (left, top) = letterbox(
+                image, self.params.char_batch_shape
+            )
+            batch.append(image)
+            letterboxes.append((ratio, np.array([left, top, left, top])))
+
+        results = modelCharX(batch, **char_predict_args(self.params, modelCharX))  # noqa
+
+        platesChars = []
+        for result, (ratio, padding) in zip(results, letterboxes):
+            # To CPU to use numpy, back to the crop coordinates
+            boxes = (result.boxes.xyxy.cpu().numpy() - padding) / ratio
+            # Predicted class
+            predictions = result.boxes.cls.cpu().numpy()
+            # Confidence on predictions
+            confidence = result.boxes.conf.cpu().numpy()
+            platesChars.append(
+                self.readPlateChars(result.names, boxes, predictions, confidence)  # noqa
+            )
+        return platesChars
+
+    def readPlateChars(self, char_id_dict1, boxes, predictions, confidence):
+        chars_th = 0.5
+        detections = make_detections(boxes, confidence, cls=predictions)
+        detections = detections[detections["confidence"] > chars_th]
+        # Char position, left to right
+        char_detected = detections[np.argsort(detections["xmin"], kind="stable")]  # noqa
+
+        chars = [char_id_dict1.get(int(cls)) for cls in char_detected["cls"]]
+        # print("Plate detected: ", ''.join(chars))
+        charConfAvg = round(float(char_detected["confidence"].mean()) * 100) if len(char_detected) else 0  # noqa
+        return "".join(chars), char_detected, charConfAvg
+
+    def stats(self):
+        """
+        Get the counters of every pipeline stage.
+
+        Returns:
+            dict: Stage name -> counters dict.
+        """
+        checked = self.detectorCalls + self.detectorSkipped
+        stats = {
+            "detector": {
+                "calls": self.detectorCalls,
+                "skipped": self.detectorSkipped,
+                "skip_ratio": self.detectorSkipped / checked if checked else 0.0,  # noqa
+            },
+            "tracker": self.tracker.stats(),
+        }
+        if self.motionGate is not None:
+            stats["motion"] = self.motionGate.stats()
+        if self.params.rectification_strategy in ("auto", "auto_manual"):
+            stats["homography"] = self.homographyCache.stats()
+        return stats
+
+    def printStats(self):
+        """Print the counters of every pipeline stage."""
+        stats = self.stats()
+        print(
+            "Plate model calls: {calls}, skipped: {skipped}, "
+            "skip ratio: {skip_ratio:.0%}".format(**stats["detector"])
+        )
+        print(
+            "Plate crops recognized: {recognized}, skipped: {skipped}".format(
+                **stats["tracker"]
+            )
+        )
+        if "homography" in stats:
+            print(
+                "Homography cache hits: {hits}, misses: {misses}, "
+                "failures: {failures}, hit rate: {hit_rate:.0%}".format(**stats["homography"])  # noqa
+            )
@@ -0,0 +1,271 @@
+# batch_recognize.py
+"""
+Headless plate recognition over recorded video files.
+
+Runs the same pipeline as the main window (``ai.recognition``) without Qt,
+decoding frames as fast as the machine allows instead of at display pace.
+Readings go to the entries database (like the GUI) or to a JSONL/CSV
+report.
+
+Examples:
+    python batch_recognize.py ./recordings --stride 2
+    python batch_recognize.py gate.mp4 --output jsonl --report gate.jsonl --crops ./crops
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import cv2
+
+from ai.models import get_device, load_models, warmup_models
+from ai.recognition import PlateRecognizer, is_valid_reading
+from configParams import Parameters
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".m4v", ".mpg", ".mpeg", ".ts")  # noqa
+
+# Size of the plate pictures saved by the GUI
+PLATE_PICTURE_SIZE = (600, 132)
+
+
+def list_videos(paths):
+    """
+    Expand files and folders into the list of video files to process.
+
+    Args:
+        paths (list of str): Video files or folders holding them.
+
+    Returns:
+        list of str: Video files, folders expanded in name order.
+    """
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            videos.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(VIDEO_EXTENSIONS)
+            )
+        else:
+            videos.append(path)
+    return videos
+
+
+def recording_start(path, capture, start=None):
+    """
+    Get the wall-clock time of a video's first frame.
+
+    Args:
+        path (str): Video file.
+        capture (cv2.VideoCapture): The opened video.
+        start (datetime, optional): Explicit start time.
+
+    Returns:
+        datetime: ``start`` if given, otherwise the file modification time
+        minus the video duration, i.e. when the recording began.
+    """
+    if start is not None:
+        return start
+    fps = capture.get(cv2.CAP_PROP_FPS) or 0
+    frames = capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+    duration = frames / fps if fps > 0 else 0
+    return datetime.fromtimestamp(os.path.getmtime(path)) - timedelta(seconds=duration)  # noqa
+
+
+class ReportWriter:
+    """
+    Writes readings to a JSONL or CSV report, optionally saving the crops.
+    """
+
+    fields = ["video", "frame", "time", "track", "plate", "charConf",
+              "plateConf", "picture"]
+
+    def __init__(self, path, fmt, crops_dir=None):
+        self.fmt = fmt
+        self.crops_dir = crops_dir
+        if crops_dir:
+            os.makedirs(crops_dir, exist_ok=True)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        if fmt == "csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=self.fields)
+            self.csv.writeheader()
+
+    def write(self, video, frame, timeNow, reading, picture):
+        pictureName = ""
+        if self.crops_dir:
+            pictureName = os.path.join(
+                self.crops_dir,
+                f"{reading.plateText}_{timeNow.strftime('%H-%M-%S_%Y-%m-%d')}.jpg",  # noqa
+            )
+            cv2.imwrite(pictureName, cv2.cvtColor(picture, cv2.COLOR_RGB2BGR))
+        row = {
+            "video": video,
+            "frame": frame,
+            "time": timeNow.isoformat(timespec="seconds"),
+            "track": reading.trackId,
+            "plate": reading.plateText,
+            "charConf": reading.charConfAvg,
+            "plateConf": int(reading.plate["confidence"] * 100),
+            "picture": pictureName,
+        }
+        if self.fmt == "csv":
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class DatabaseWriter:
+    """
+    Queues readings on the entries writer, as the GUI does.
+    """
+
+    def __init__(self, camera=""):
+        self.camera = camera
+        # Imported here so report runs never touch the databases
+        from database.db_entries_utils import entriesWriter
+        from database.db_resident_utils import db_get_plate_status
+
+        self.entriesWriter = entriesWriter
+        self.plateStatus = db_get_plate_status
+
+    def write(self, video, frame, timeNow, reading, picture):
+        status = self.plateStatus(reading.plateText)
+        plateConf = int(reading.plate["confidence"] * 100)
+        # Archived footage is replayed much faster than real time, so wait
+        # for room instead of dropping entries
+        self.entriesWriter.submit((
+            reading.plateText,
+            reading.charConfAvg,
+            plateConf,
+            picture,
+            status,
+            timeNow,
+            self.camera,
+        ), block=True)
+
+    def close(self):
+        self.entriesWriter.shutdown(timeout=60)
+
+
+def process_video(path, recognizer, writer, stride=1, start=None, min_confidence=70):  # noqa
+    """
+    Recognize the plates of one video file.
+
+    Args:
+        path (str): Video file.
+        recognizer (PlateRecognizer): The pipeline.
+        writer: ReportWriter or DatabaseWriter receiving the readings.
+        stride (int): Only every ``stride``-th frame is recognized.
+        start (datetime, optional): Time of the first frame.
+        min_confidence (int): Minimum char confidence of a reading.
+
+    Returns:
+        tuple: (frames read, frames recognized, readings written).
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        print(f"Could not open {path}")
+        return 0, 0, 0
+    fps = capture.get(cv2.CAP_PROP_FPS) or 0
+    startTime = recording_start(path, capture, start)
+    recognizer.reset()
+
+    def save(frameIndex, readings):
+        written = 0
+        seconds = frameIndex / fps if fps > 0 else 0
+        timeNow = startTime + timedelta(seconds=seconds)
+        for reading in readings:
+            if not is_valid_reading(reading.plateText, reading.charConfAvg, min_confidence):  # noqa
+                continue
+            picture = cv2.resize(reading.croppedPlate, PLATE_PICTURE_SIZE)
+            writer.write(path, frameIndex, timeNow, reading, picture)
+            written += 1
+        return written
+
+    frameIndex, recognized, written = 0, 0, 0
+    while True:
+        # Skipped frames are only grabbed, not decoded into an image
+        if frameIndex % stride:
+            if not capture.grab():
+                break
+            frameIndex += 1
+            continue
+        ok, frame = capture.read()
+        if not ok:
+            break
+        _, readings = recognizer.process(frame, highlight=False)
+        recognized += 1
+        written += save(frameIndex, readings)
+        frameIndex += 1
+
+    written += save(frameIndex, recognizer.flush())
+    capture.release()
+    return frameIndex, recognized, written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recognize plates in recorded videos without the GUI."
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="Video files or folders with videos.")
+    parser.add_argument("--stride", type=int, default=1,
+                        help="Recognize every N-th frame (default 1).")
+    parser.add_argument("--output", choices=["db", "jsonl", "csv"],
+                        default="db", help="Where readings go (default db).")
+    parser.add_argument("--report", default=None,
+                        help="Report file for jsonl/csv output.")
+    parser.add_argument("--crops", default=None,
+                        help="Folder for plate pictures of jsonl/csv output.")
+    parser.add_argument("--start", default=None,
+                        help="ISO time of the first frame of the first video "
+                             "(default: from the file modification time).")
+    parser.add_argument("--min-confidence", type=int, default=70,
+                        help="Minimum char confidence of a reading.")
+    parser.add_argument("--camera", default="",
+                        help="Camera ID the db entries are tagged with.")
+    args = parser.parse_args()
+
+    params = Parameters()
+    modelPlate, modelCharX = load_models(
+        params.modelPlate_path, params.modelCharX_path,
+        get_device(params.model_backend), params.model_backend,
+        params.char_int8,
+    )
+    warmup_models(modelPlate, modelCharX, params)
+    recognizer = PlateRecognizer(params, lambda: (modelPlate, modelCharX))
+
+    if args.output == "db":
+        writer = DatabaseWriter(args.camera)
+    else:
+        report = args.report or f"plates_{datetime.now():%Y-%m-%d_%H-%M-%S}.{args.output}"  # noqa
+        writer = ReportWriter(report, args.output, args.crops)
+        print(f"Writing report to {report}")
+
+    start = datetime.fromisoformat(args.start) if args.start else None
+    try:
+        for path in list_videos(args.inputs):
+            began = time.perf_counter()
+            frames, recognized, written = process_video(
+                path, recognizer, writer, max(1, args.stride), start,
+                args.min_confidence,
+            )
+            elapsed = time.perf_counter() - began
+            print(
+                f"{path}: {frames} frames, {recognized} recognized, "
+                f"{written} readings, {recognized / max(elapsed, 1e-9):.1f} fps"  # noqa
+            )
+            recognizer.printStats()
+            # Only the first video starts at the given time
+            start = None
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
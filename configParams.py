@@ -2,10 +2,16 @@
 
 from configparser import ConfigParser
 
+RECTIFICATION_STRATEGIES = ("off", "manual", "auto", "auto_manual")
+# gpu: PyTorch on CUDA/MPS when available, cpu: PyTorch on CPU, onnx and
+# openvino: the models exported by export_models.py, on CPU
+MODEL_BACKENDS = ("gpu", "cpu", "onnx", "openvino")
+
 
 class Parameters:
 
     def __init__(self):
+        # Inference settings pinned on every model call (see ai.models)
         self.imgsz = 640
         self.conf_thres = 0.25
         self.max_det = 1000
@@ -26,6 +32,21 @@ class Parameters:
 
         self.rect_size = 15000
 
+        # Plate crops are letterboxed to this (height, width) so every plate
+        # of a frame goes through the char model in a single batch
+        self.char_batch_shape = (320, 640)
+
+        # Plate tracking: boxes overlapping by this IoU are the same plate,
+        # which is read again every N frames or on a better view of it
+        self.tracker_iou_threshold = 0.3
+        self.tracker_max_missed = 15
+        self.tracker_recognize_every = 10
+        self.tracker_quality_gain = 1.2
+        # A track's consensus reading is reported once it survived this many
+        # readings with at least this confidence, or when the plate leaves
+        self.consensus_stable_readings = 3
+        self.consensus_min_confidence = 70
+
         self.pred_shape = (480, 640, 3)
         self.vis_shape = (800, 600)
 
@@ -38,11 +59,34 @@ class Parameters:
         modelconfig = config_object["MODELCONFIG"]
         self.modelPlate_path = modelconfig["platemodel"]
         self.modelCharX_path = modelconfig["charmodel"]
+        self.model_backend = modelconfig.get("device", fallback="gpu").lower()
+        if self.model_backend not in MODEL_BACKENDS:
+            print("Unknown model device:", self.model_backend)
+            self.model_backend = "gpu"
+        # INT8 char model from quantize_char_model.py, onnx/openvino only
+        self.char_int8 = modelconfig.getboolean("charint8", fallback=False)
+        # FP16 inference, only applied on CUDA devices
+        self.half = modelconfig.getboolean("half", fallback=False)
         sourceConfig = config_object["SOURCEDETECT"]
         self.video = sourceConfig["video"]
         self.rtps = sourceConfig["rtps"]
         self.webcam = sourceConfig["webcam"]
         self.source = sourceConfig["source"]
+        # Frames kept by the capture thread; older ones are dropped
+        self.frame_buffer_size = sourceConfig.getint("buffersize", fallback=2)
+        # One capture per [CAMERA:<id>] section, the id tags its entries;
+        # without any, the video above is the only camera
+        self.cameras = readCameras(config_object, self.video)
+
+        # Motion gate: the plate model only runs on frames with motion
+        # inside the ROI polygon
+        self.motion_enabled = config_object.getboolean(
+            "MOTION", "enabled", fallback=False
+        )
+        self.motion_roi = parseRoi(config_object.get("MOTION", "roi", fallback=""))  # noqa
+        self.motion_threshold = config_object.getint("MOTION", "threshold", fallback=25)  # noqa
+        self.motion_min_area = config_object.getfloat("MOTION", "minarea", fallback=0.002)  # noqa
+        self.motion_hold = config_object.getint("MOTION", "hold", fallback=15)
 
         # services
         external_service_config = config_object["EXTERNAL-SERVICE"]
@@ -54,9 +98,20 @@ class Parameters:
         self.cpu_or_cuda = "cuda"
 
         # Homography setup
-        self.set_homography = False
-        self.set_homography_manual = False
-        self.src_points_manual = [[0, 0], [640, 0], [640, 480], [0, 480]]
+        # off: no rectification, manual: fixed src_points_manual,
+        # auto: detected plate corners, auto_manual: auto, manual on failure
+        self.rectification_strategy = config_object.get(
+            "RECTIFICATION", "strategy", fallback="off"
+        )
+        if self.rectification_strategy not in RECTIFICATION_STRATEGIES:
+            print("Unknown rectification strategy:", self.rectification_strategy)  # noqa
+            self.rectification_strategy = "off"
+        # Manual plate corners, given in the crop scaled to char_batch_shape
+        # as [top-left, top-right, bottom-right, bottom-left]
+        self.src_points_manual = [[0, 0], [640, 0], [640, 320], [0, 320]]
+        # A plate's homography is reused while its box moves less than this
+        # fraction of the box size
+        self.homography_cache_tolerance = 0.05
 
         self.rectification_text_dict = {
             "0": "O",
@@ -138,3 +193,45 @@ def getFieldNames(fieldsList):
     for value in fieldsList:
         fieldNamesOutput.append(params.fieldNames[value])
     return fieldNamesOutput
+
+
+def parseRoi(text):
+    """
+    Parse a region of interest polygon from the config file.
+
+    Args:
+        text (str): Points as "x,y" pairs separated by spaces, in 0-1 frame
+            coordinates, e.g. "0,0 1,0 1,1 0,1".
+
+    Returns:
+        list of tuple or None: The polygon points, or None (whole frame) if
+        fewer than three points are given.
+    """
+    points = [tuple(float(v) for v in point.split(","))
+              for point in text.split()]
+    return points if len(points) >= 3 else None
+
+
+def readCameras(config_object, default_source):
+    """
+    Read the camera sources from the config file.
+
+    Args:
+        config_object (ConfigParser): The parsed config file.
+        default_source (str): Source of the single camera used when no
+            camera section is configured.
+
+    Returns:
+        list of dict: Cameras as {"id": str, "source": str or int}, in file
+        order. Webcam indexes are returned as int.
+    """
+    cameras = []
+    for section in config_object.sections():
+        if not section.startswith("CAMERA:"):
+            continue
+        source = config_object[section]["source"].strip()
+        cameras.append({
+            "id": section.split(":", 1)[1].strip(),
+            "source": int(source) if source.isdigit() else source,
+        })
+    return cameras or [{"id": "main", "source": default_source}]
@@ -2,6 +2,8 @@
 # This class manages database entry data for display in the main window table.
 # It provides methods to format and retrieve data in specific formats.
 
+from datetime import datetime
+
 from PySide6.QtGui import QColor
 from PySide6.QtWidgets import QTableWidgetItem
 
@@ -22,9 +24,12 @@ class Entries:
         eDate (str): Entry date
         charPercent (float): Character recognition confidence percentage
         platePercent (float): Plate detection confidence percentage
+        ts (int): Entry time as a Unix epoch timestamp
+        id (int): Row id in the entries table, None until inserted
+        camera (str): ID of the camera that read the plate
     """
 
-    def __init__(self, platePercent, charPercent, eDate, eTime, plateNum, status):
+    def __init__(self, platePercent, charPercent, eDate, eTime, plateNum, status, ts=None, id=None, camera=""):
         """
         Initialize an Entries object with the given parameters.
 
@@ -35,6 +40,10 @@ class Entries:
             eTime (str): Entry time
             plateNum (str): License plate number
             status (int): Entry status code
+            ts (int): Optional epoch timestamp; derived from eDate and eTime
+                (local time) when not given
+            id (int): Optional row id
+            camera (str): Optional camera ID
         """
         self.status = status
         self.plateNum = plateNum
@@ -42,6 +51,11 @@ class Entries:
         self.eDate = eDate
         self.charPercent = charPercent
         self.platePercent = platePercent
+        if ts is None:
+            ts = int(datetime.strptime(f"{eDate} {eTime}", "%Y-%m-%d %H:%M:%S").timestamp())
+        self.ts = ts
+        self.id = id
+        self.camera = camera
 
     def getTime(self):
         """
@@ -61,6 +75,24 @@ class Entries:
 
         return self.eDate
 
+    def getTimestamp(self):
+        """
+        Get the entry time as a Unix epoch timestamp.
+
+        Returns:
+            int: Seconds since the epoch
+        """
+        return self.ts
+
+    def getCamera(self):
+        """
+        Get the ID of the camera that read the plate.
+
+        Returns:
+            str: The camera ID, empty for entries older than the tagging
+        """
+        return self.camera
+
     def getPlatePic(self):
         """
         Get the path to the license plate image.
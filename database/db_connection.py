@@ -0,0 +1,67 @@
+# db_connection.py
+"""
+Shared SQLite connection manager for the entries and residents databases.
+
+Each thread keeps one open connection per database file, so helpers no
+longer pay for a connect/close on every call. Connections are switched to
+WAL journaling, which lets the GUI read while a worker thread writes, and
+keep a statement cache so repeated parameterized queries are prepared once.
+"""
+
+import sqlite3
+import threading
+
+_local = threading.local()
+
+# Statements kept prepared per connection by the sqlite3 module
+STATEMENT_CACHE_SIZE = 256
+
+
+def get_connection(db_path):
+    """
+    Get the calling thread's connection to a database, opening it if needed.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: A connection in WAL mode, owned by this thread.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    sqlConnect = connections.get(db_path)
+    if sqlConnect is None:
+        sqlConnect = sqlite3.connect(db_path,
+                                     cached_statements=STATEMENT_CACHE_SIZE)
+        sqlConnect.execute("PRAGMA journal_mode=WAL")
+        sqlConnect.execute("PRAGMA synchronous=NORMAL")
+        connections[db_path] = sqlConnect
+    return sqlConnect
+
+
+def close_connections():
+    """
+    Close every connection opened by the calling thread.
+    """
+    connections = getattr(_local, "connections", None)
+    if not connections:
+        return
+    for sqlConnect in connections.values():
+        sqlConnect.close()
+    connections.clear()
+
+
+def fetch_dicts(sqlCursor):
+    """
+    Fetch all remaining rows of a cursor as column-name dictionaries.
+
+    Args:
+        sqlCursor (sqlite3.Cursor): An executed cursor.
+
+    Returns:
+        list of dict: One dictionary per row.
+    """
+    columns = [c[0] for c in sqlCursor.description]
+    return [dict(zip(columns, row)) for row in sqlCursor.fetchall()]
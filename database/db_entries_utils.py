@@ -1,11 +1,14 @@
 import datetime
-import sqlite3
-import time
 import os
 
+import cv2
+import numpy as np
+
 from services.send import send_data_to_external_service  # noqa
 from configParams import Parameters
 from database.classEntries import Entries
+from database.db_connection import fetch_dicts, get_connection
+from database.entries_writer import EntriesWriter
 from helper.text_decorators import check_similarity_threshold
 
 params = Parameters()
@@ -16,70 +19,179 @@ fieldsList = ["platePercent", "charPercent",
 dbEntries = params.dbEntries
 
 
-def insertEntries(entry):
-    sqlConnect = sqlite3.connect(dbEntries)
-    sqlCursor = sqlConnect.cursor()
-
-    sqlCursor.execute(
-        "INSERT OR IGNORE INTO entries VALUES (:platePercent, :charPercent, :eDate, :eTime, :plateNum, :status)", # noqa
+def dbMigrateEntries():
+    """
+    Bring the entries table up to the current schema.
+
+    Older databases store the entry time only as the eDate/eTime strings
+    and have no key or index. The table is rebuilt with a rowid primary key
+    and an integer epoch ``ts`` column (filled from eDate/eTime, which are
+    local time), and indexed on (plateNum, ts) and (ts). Entries are tagged
+    with the ID of the camera that read them; older rows get an empty one.
+    A missing table is created with the current schema. Running it on an
+    up-to-date table does nothing.
+    """
+    sqlConnect = get_connection(dbEntries)
+    columns = [row[1] for row in sqlConnect.execute("PRAGMA table_info(entries)")]  # noqa
+    with sqlConnect:
+        if not columns:
+            sqlConnect.execute("""CREATE TABLE entries (
+                id INTEGER PRIMARY KEY
+                ,platePercent INTEGER
+                ,charPercent INTEGER
+                ,eDate VARCHAR(25)
+                ,eTime VARCHAR(25)
+                ,plateNum VARCHAR(20) NOT NULL
+                ,status INTEGER
+                ,ts INTEGER NOT NULL DEFAULT 0
+                ,camera VARCHAR(20) NOT NULL DEFAULT '')""")
+            columns = [row[1] for row in sqlConnect.execute("PRAGMA table_info(entries)")]  # noqa
+        if "ts" not in columns:
+            sqlConnect.execute("""CREATE TABLE entries_new (
+                id INTEGER PRIMARY KEY
+                ,platePercent INTEGER
+                ,charPercent INTEGER
+                ,eDate VARCHAR(25)
+                ,eTime VARCHAR(25)
+                ,plateNum VARCHAR(20) NOT NULL
+                ,status INTEGER
+                ,ts INTEGER NOT NULL DEFAULT 0)""")
+            sqlConnect.execute("""INSERT INTO entries_new
+                (platePercent, charPercent, eDate, eTime, plateNum, status, ts)
+                SELECT platePercent, charPercent, eDate, eTime, plateNum, status,
+                       COALESCE(CAST(strftime('%s', eDate || ' ' || eTime, 'utc') AS INTEGER), 0)
+                FROM entries ORDER BY eDate, eTime""")  # noqa
+            sqlConnect.execute("DROP TABLE entries")
+            sqlConnect.execute("ALTER TABLE entries_new RENAME TO entries")
+        if "camera" not in columns:
+            sqlConnect.execute("ALTER TABLE entries ADD COLUMN camera VARCHAR(20) NOT NULL DEFAULT ''")  # noqa
+        sqlConnect.execute("CREATE INDEX IF NOT EXISTS idx_entries_plate_ts ON entries (plateNum, ts)")  # noqa
+        sqlConnect.execute("CREATE INDEX IF NOT EXISTS idx_entries_ts ON entries (ts)")  # noqa
+
+
+dbMigrateEntries()
+
+
+def insertEntries(entry, commit=True):
+    sqlConnect = get_connection(dbEntries)
+    sqlConnect.execute(
+        "INSERT INTO entries (platePercent, charPercent, eDate, eTime, plateNum, status, ts, camera) VALUES (:platePercent, :charPercent, :eDate, :eTime, :plateNum, :status, :ts, :camera)", # noqa
         vars(entry),
     )
-
-    sqlConnect.commit()
-    sqlConnect.close()
+    if commit:
+        sqlConnect.commit()
 
 
 def dbRemoveEntries(plateNumber):
-    sqlConnect = sqlite3.connect(dbEntries)
-    sqlCursor = sqlConnect.cursor()
-    removeEntriesSQL = f"""DELETE FROM entries WHERE plateNum='{plateNumber}'"""  # noqa
-    removeEntries = sqlCursor.execute(removeEntriesSQL)  # noqa
-    sqlConnect.commit()
-    sqlConnect.close()
-
-
-def dbGetPlateLatestEntry(plateNumber):
-    sqlConnect = sqlite3.connect(dbEntries)
-    sqlCursor = sqlConnect.cursor()
-
-    FullEntriesSQL = f"""SELECT * FROM entries WHERE plateNum='{plateNumber}' ORDER BY eDate DESC LIMIT 1"""  # noqa
-    FullEntries = sqlCursor.execute(FullEntriesSQL).fetchall()
-
-    if len(FullEntries) != 0:
-        FullData = dict(zip([c[0] for c in sqlCursor.description], FullEntries[0]))  # noqa
-        sqlConnect.commit()
-        sqlConnect.close()
-        return Entries(**FullData)
+    sqlConnect = get_connection(dbEntries)
+    with sqlConnect:
+        sqlConnect.execute("DELETE FROM entries WHERE plateNum = ?",
+                           (plateNumber,))
+
+
+def dbGetPlateEntryNear(plateNumber, camera, ts, window=60):
+    """
+    Get an entry of a plate read by a camera close to a given time.
+
+    Args:
+        plateNumber (str): Plate number.
+        camera (str): Camera ID.
+        ts (int): Epoch timestamp to look around.
+        window (int): Seconds before and after ts to look in.
+
+    Returns:
+        Entries or None: An entry within the window, or None.
+    """
+    sqlConnect = get_connection(dbEntries)
+    nearEntriesSQL = """SELECT * FROM entries WHERE plateNum = ? AND camera = ? AND ts BETWEEN ? AND ? LIMIT 1"""  # noqa
+    nearEntries = fetch_dicts(sqlConnect.execute(
+        nearEntriesSQL, (plateNumber, camera, ts - window, ts + window)
+    ))
+    if len(nearEntries) != 0:
+        return Entries(**nearEntries[0])
     return None
 
 
 def dbGetPlateStatus(plateNum):
-    with sqlite3.connect(dbEntries) as sqlConnect:
-        sqlCursor = sqlConnect.cursor()
-        plateStatusSQL = "SELECT plateNum,statusNum FROM PlateStatus WHERE plateNum = ?"  # noqa
-        status = sqlCursor.execute(plateStatusSQL, (plateNum,)).fetchone()
-        if status is None:
-            return 0
-        else:
-            return status[1]
+    sqlConnect = get_connection(dbEntries)
+    plateStatusSQL = "SELECT plateNum,statusNum FROM PlateStatus WHERE plateNum = ?"  # noqa
+    status = sqlConnect.execute(plateStatusSQL, (plateNum,)).fetchone()
+    if status is None:
+        return 0
+    else:
+        return status[1]
 
 
 def dbGetAllEntries(limit=10, orderBy="eDate", orderType="DESC", whereLike=""):
-    listAllEntries = []
-    sqlConnect = sqlite3.connect(dbEntries)
-    sqlCursor = sqlConnect.cursor()
-    allEntriesSQL = f"""SELECT * FROM entries WHERE plateNum LIKE '%{whereLike}%' ORDER BY {orderBy} {orderType} , eTime {orderType} LIMIT {limit} """  # noqa
-    allEntries = sqlCursor.execute(allEntriesSQL).fetchall()
-    for i in range(len(allEntries)):
-        FullData = dict(zip([c[0] for c in sqlCursor.description], allEntries[i]))  # noqa
-        listAllEntries.append(Entries(**FullData))
-    sqlConnect.commit()
-    sqlCursor.close()
-    sqlConnect.close()
-    return listAllEntries
+    # Column and direction can't be bound as parameters, so whitelist them
+    if orderBy not in fieldsList:
+        raise ValueError(f"Invalid orderBy column: {orderBy}")
+    orderType = "ASC" if str(orderType).upper() == "ASC" else "DESC"
+    # Date and time ordering goes through the indexed timestamp
+    if orderBy in ("eDate", "eTime"):
+        orderBy = "ts"
+
+    sqlConnect = get_connection(dbEntries)
+    if whereLike:
+        allEntriesSQL = f"""SELECT * FROM entries WHERE plateNum LIKE ? ORDER BY {orderBy} {orderType} , id {orderType} LIMIT ? """  # noqa
+        sqlArgs = (f"%{whereLike}%", int(limit))
+    else:
+        # Without a filter the latest rows come straight from the ts index
+        allEntriesSQL = f"""SELECT * FROM entries ORDER BY {orderBy} {orderType} , id {orderType} LIMIT ? """  # noqa
+        sqlArgs = (int(limit),)
+    allEntries = fetch_dicts(sqlConnect.execute(allEntriesSQL, sqlArgs))
+    return [Entries(**FullData) for FullData in allEntries]
+
+
+def dbPersistEntry(job):
+    """
+    Save the plate picture and insert the entry of a queued detection.
+    The picture is a QImage from the GUI or an RGB array.
+
+    Runs on the entries writer thread inside its batch transaction. The
+    entry is skipped if the same camera already registered the plate within
+    a minute of it, before or after, so replayed or out of order readings
+    are deduplicated too.
+
+    Returns:
+        Entries or None: The inserted entry, or None if it was skipped.
+    """
+    number, charConfAvg, plateConfAvg, croppedPlate, status, timeNow, camera = job  # noqa
+    if dbGetPlateEntryNear(number, camera, int(timeNow.timestamp())) is not None:  # noqa
+        return None
+
+    display_time = timeNow.strftime("%H:%M:%S")
+    display_date = timeNow.strftime("%Y-%m-%d")
+
+    os.makedirs("temp", exist_ok=True)
+    plateImgName = os.path.join(
+        "temp",
+        f"{number}_{timeNow.strftime('%H-%M-%S_%Y-%m-%d')}.jpg",  # noqa
+    )
+    if isinstance(croppedPlate, np.ndarray):
+        # RGB crops from the headless tools
+        cv2.imwrite(plateImgName, cv2.cvtColor(croppedPlate, cv2.COLOR_RGB2BGR))  # noqa
+    else:
+        croppedPlate.save(plateImgName, "JPEG")
+
+    entries = Entries(
+        plateConfAvg,
+        charConfAvg,
+        display_date,
+        display_time,
+        number,
+        status,
+        camera=camera,
+    )
+
+    insertEntries(entries, commit=False)
+    # send_data_to_external_service(external_service_data)
+    return entries
 
 
-similarityTemp = ""
+entriesWriter = EntriesWriter(dbEntries, dbPersistEntry)
+# Last plate submitted by each camera
+similarityTemp = {}
 
 
 def db_entries_time(
@@ -89,68 +201,25 @@ def db_entries_time(
     croppedPlate,
     status,
     external_service_data: dict = None,
+    camera="",
 ):
-    global similarityTemp
     # print(f"[DEBUG] External Service Data: {external_service_data}")
     # print(f"[DEBUG] Tipo de objeto: {type(croppedPlate)}")
-    isSimilar = check_similarity_threshold(similarityTemp, number)
+    isSimilar = check_similarity_threshold(similarityTemp.get(camera, ""), number)  # noqa
     if not isSimilar:
-        similarityTemp = number
-        if True:
-            timeNow = datetime.now()
-            result = dbGetPlateLatestEntry(number)
-            if result is not None and number != "":
-
-                strTime = result.getTime()
-                strDate = result.getDate()
-                if timeDifference(strTime, strDate):
-                    display_time = timeNow.strftime("%H:%M:%S")
-                    display_date = timeNow.strftime("%Y-%m-%d")
-
-                    os.makedirs("temp", exist_ok=True)
-                    plateImgName = os.path.join(
-                        "temp",
-                        f"{number}_{datetime.now().strftime('%H-%M-%S_%Y-%m-%d')}.jpg",  # noqa
-                    )
-                    saved = croppedPlate.save(plateImgName, "JPEG")
-
-                    entries = Entries(
-                        plateConfAvg,
-                        charConfAvg,
-                        display_date,
-                        display_time,
-                        number,
-                        status,
-                    )
-
-                    insertEntries(entries)
-                    # send_data_to_external_service(external_service_data)
-                else:
-                    pass
-            else:
-                if number != "":
-                    display_time = time.strftime("%H:%M:%S")
-                    display_date = time.strftime("%Y-%m-%d")
-
-                    os.makedirs("temp", exist_ok=True)
-                    plateImgName = os.path.join(
-                        "temp",
-                        f"{number}_{datetime.now().strftime('%H-%M-%S_%Y-%m-%d')}.jpg",  # noqa
-                    )
-
-                    saved = croppedPlate.save(plateImgName, "JPEG")  # noqa
-
-                    entries = Entries(
-                        plateConfAvg,
-                        charConfAvg,
-                        display_date,
-                        display_time,
-                        number,
-                        status,
-                    )
-
-                    insertEntries(entries)
-                    # send_data_to_external_service(external_service_data)
+        similarityTemp[camera] = number
+        if number != "":
+            # The query, JPEG encode and INSERT happen on the writer thread;
+            # the image is copied since the caller's buffer may be reused.
+            entriesWriter.submit((
+                number,
+                charConfAvg,
+                plateConfAvg,
+                croppedPlate.copy(),
+                status,
+                datetime.datetime.now(),
+                camera,
+            ))
 
 
 def getFieldNames(fieldsList):
@@ -158,22 +227,3 @@ def getFieldNames(fieldsList):
     for value in fieldsList:
         fieldNamesOutput.append(params.fieldNames[value])
     return fieldNamesOutput
-
-
-from datetime import datetime  # noqa
-
-
-def timeDifference(strTime, strDate):
-    start_time = datetime.strptime(strTime + " " + strDate, "%H:%M:%S %Y-%m-%d")  # noqa
-    end_time = datetime.strptime(
-        datetime.now().strftime("%H:%M:%S %Y-%m-%d"), "%H:%M:%S %Y-%m-%d"
-    )
-    delta = end_time - start_time
-
-    sec = delta.total_seconds()
-    min = (sec / 60).__ceil__()
-
-    if min > 1:
-        return True
-    else:
-        return False
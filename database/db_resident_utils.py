@@ -7,17 +7,19 @@ It provides utilities for CRUD operations on resident data.
 import datetime
 import sqlite3
 import time
-import pandas as pd
 from pathlib import Path
 
 from configParams import Parameters
 from database.classResidents import Resident
+from database.db_connection import fetch_dicts, get_connection
+from database.resident_cache import ResidentCache
 from helper.text_decorators import check_similarity_threshold
 
 params = Parameters()
 
 fieldsList = ['fName', 'lName', 'building', 'block', 'num', 'carModel', 'plateNum', 'status']
 dbResidents = params.dbResidents
+residentCache = ResidentCache(dbResidents)
 
 
 # def insertResident(resident, update=False, editingPlate=''):
@@ -64,7 +66,7 @@ dbResidents = params.dbResidents
 def insertResident(resident, update=False, editingPlate=''):
     """Insert or update resident in database"""
     try:
-        sqlConnect = sqlite3.connect(dbResidents)
+        sqlConnect = get_connection(dbResidents)
         sqlCursor = sqlConnect.cursor()
 
         if update:
@@ -95,9 +97,10 @@ def insertResident(resident, update=False, editingPlate=''):
         
     except sqlite3.Error as e:
         print(f"Database error: {e}")
+        sqlConnect.rollback()
         raise
     finally:
-        sqlConnect.close()
+        residentCache.invalidate()
 
 def getResidentByName(conn, cur, lastname):
     """
@@ -121,24 +124,20 @@ def dbRemoveResident(plateNumber):
     """
     Remove a resident from the database by plate number.
     """
-    sqlConnect = sqlite3.connect(dbResidents)
-    sqlCursor = sqlConnect.cursor()
-    removeResidentSQL = f"""DELETE FROM residents WHERE plateNum='{plateNumber}'"""
-    sqlCursor.execute(removeResidentSQL)
-    sqlConnect.commit()
-    sqlConnect.close()
+    sqlConnect = get_connection(dbResidents)
+    with sqlConnect:
+        sqlConnect.execute("DELETE FROM residents WHERE plateNum = ?",
+                           (plateNumber,))
+    residentCache.invalidate()
 
 
 def dbGetPlateExist(plateNumber):
     """
     Check if a plate number exists in the database.
     """
-    sqlConnect = sqlite3.connect(dbResidents)
-    sqlCursor = sqlConnect.cursor()
-    PlateExistSQL = f"""SELECT status FROM residents WHERE plateNum='{plateNumber}'"""
-    PlateExist = sqlCursor.execute(PlateExistSQL).fetchone()
-    sqlConnect.commit()
-    sqlConnect.close()
+    sqlConnect = get_connection(dbResidents)
+    PlateExistSQL = "SELECT status FROM residents WHERE plateNum = ?"
+    PlateExist = sqlConnect.execute(PlateExistSQL, (plateNumber,)).fetchone()
     return PlateExist is not None
 
 
@@ -147,42 +146,28 @@ def db_get_plate_status(plateNumber):
     Get the status of a plate number.
     Returns 2 if plate not found (Unregistered).
     """
-    sqlConnect = sqlite3.connect(dbResidents)
-    sqlCursor = sqlConnect.cursor()
-    PlateStatusSQL = f"""SELECT status FROM residents WHERE plateNum='{plateNumber}'"""
-    PlateStatus = sqlCursor.execute(PlateStatusSQL).fetchone()
-    sqlConnect.commit()
-    sqlConnect.close()
-    return PlateStatus[0] if PlateStatus is not None else 2
+    resident = residentCache.get(plateNumber)
+    return resident[0] if resident is not None else 2
 
 
 def db_get_plate_owner_name(plateNumber):
     """
     Get the owner's full name by plate number.
     """
-    sqlConnect = sqlite3.connect(dbResidents)
-    sqlCursor = sqlConnect.cursor()
-    OwnerNameSQL = f"""SELECT fName, lName FROM residents WHERE plateNum='{plateNumber}'"""
-    OwnerName = sqlCursor.execute(OwnerNameSQL).fetchone()
-    sqlConnect.commit()
-    sqlConnect.close()
-    return '{} {}'.format(OwnerName[0], OwnerName[1]) if OwnerName else None
+    resident = residentCache.get(plateNumber)
+    return '{} {}'.format(resident[1], resident[2]) if resident else None
 
 
 def dbGetResidentDatasByPlate(plateNumber):
     """
     Get complete resident information by plate number.
     """
-    sqlConnect = sqlite3.connect(dbResidents)
-    sqlCursor = sqlConnect.cursor()
-    FullResidentSQL = f"""SELECT * FROM residents WHERE plateNum='{plateNumber}'"""
-    FullResident = sqlCursor.execute(FullResidentSQL).fetchall()
+    sqlConnect = get_connection(dbResidents)
+    FullResidentSQL = "SELECT * FROM residents WHERE plateNum = ?"
+    FullResident = fetch_dicts(sqlConnect.execute(FullResidentSQL, (plateNumber,)))
     
     if FullResident:
-        FullData = dict(zip([c[0] for c in sqlCursor.description], FullResident[0]))
-        sqlConnect.commit()
-        sqlConnect.close()
-        return Resident(**FullData)
+        return Resident(**FullResident[0])
     return None
 
 
@@ -190,16 +175,12 @@ def dbGetResidentDatasBylName(lName):
     """
     Get resident information by last name.
     """
-    sqlConnect = sqlite3.connect(dbResidents)
-    sqlCursor = sqlConnect.cursor()
-    FullResidentSQL = f"""SELECT * FROM residents WHERE lName LIKE '%{lName}%'"""
-    FullResident = sqlCursor.execute(FullResidentSQL).fetchall()
+    sqlConnect = get_connection(dbResidents)
+    FullResidentSQL = "SELECT * FROM residents WHERE lName LIKE ?"
+    FullResident = fetch_dicts(sqlConnect.execute(FullResidentSQL, (f'%{lName}%',)))
     
     if FullResident:
-        FullData = dict(zip([c[0] for c in sqlCursor.description], FullResident[0]))
-        sqlConnect.commit()
-        sqlConnect.close()
-        return Resident(**FullData)
+        return Resident(**FullResident[0])
     return None
 
 
@@ -207,17 +188,17 @@ def dbGetAllResidents(limit=100, orderBy='lName', orderType='ASC', whereLike='')
     """
     Get all residents with filtering and ordering options.
     """
-    listAllResidents = []
-    sqlConnect = sqlite3.connect(dbResidents)
-    sqlCursor = sqlConnect.cursor()
-    allResidentSQL = f"""SELECT * FROM residents WHERE lName LIKE '%{whereLike}%' ORDER BY {orderBy} {orderType} LIMIT {limit} """
-    allResident = sqlCursor.execute(allResidentSQL).fetchall()
-    for i in range(len(allResident)):
-        FullData = dict(zip([c[0] for c in sqlCursor.description], allResident[i]))
-        listAllResidents.append(Resident(**FullData))
-    sqlConnect.commit()
-    sqlConnect.close()
-    return listAllResidents
+    # Column and direction can't be bound as parameters, so whitelist them
+    if orderBy not in fieldsList:
+        raise ValueError(f"Invalid orderBy column: {orderBy}")
+    orderType = 'DESC' if str(orderType).upper() == 'DESC' else 'ASC'
+
+    sqlConnect = get_connection(dbResidents)
+    allResidentSQL = f"""SELECT * FROM residents WHERE lName LIKE ? ORDER BY {orderBy} {orderType} LIMIT ? """
+    allResident = fetch_dicts(
+        sqlConnect.execute(allResidentSQL, (f'%{whereLike}%', int(limit)))
+    )
+    return [Resident(**FullData) for FullData in allResident]
 
 
 similarityTemp = ''
@@ -237,6 +218,7 @@ def dbEnteriesTime(number, charConfAvg, plateConfAvg, croppedPlate, status):
     Returns:
         None
     """
+    import pandas as pd  # Only the legacy CSV log needs it
     global similarityTemp
     dfReadEnteries = pd.read_csv(str(Path().absolute()) + '/base/enteries.csv')
 
@@ -260,6 +242,7 @@ def _save_entry(number, charConfAvg, plateConfAvg, croppedPlate, status, timeNow
     """
     Helper function to save entry data.
     """
+    import pandas as pd  # Only the legacy CSV log needs it
     display_time = timeNow.strftime("%H:%M:%S")
     display_date = timeNow.strftime("%Y-%m-%d")
     plateImgName = f'temp/{number}-{timeNow.strftime("%H:%M:%S-%Y-%m-%d")}.jpg'
@@ -283,6 +266,7 @@ def dbRefreshTable():
     """
     Refresh the entries table with the most recent 20 records.
     """
+    import pandas as pd  # Only the legacy CSV log needs it
     dfReadEnteries = pd.read_csv(str(Path().absolute()) + '/base/enteries.csv')
     return dfReadEnteries.iloc[-20:].sort_index(ascending=False)
 
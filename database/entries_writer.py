@@ -0,0 +1,156 @@
+# entries_writer.py
+"""
+Background persistence of recognized entries.
+
+Saving an entry means a latest-entry query, a JPEG encode and an INSERT.
+Doing that on the Qt GUI thread freezes the interface whenever the disk
+hiccups, so the GUI only queues the entry and this writer thread does the
+work, committing whatever has piled up in a single transaction.
+"""
+
+import queue
+import threading
+
+from database.db_connection import close_connections, get_connection
+
+_STOP = object()
+
+
+class EntriesWriter:
+    """
+    Worker thread that persists queued entries in batched transactions.
+
+    Attributes:
+        on_written (callable): Optional callback receiving the list of
+            entries written by each batch. It is called on the writer
+            thread, so GUI code should pass a Qt signal's ``emit``.
+        written (int): Entries persisted so far.
+        rejected (int): Entries dropped because the queue was full.
+        failed (int): Entries whose handler raised; they are skipped and
+            the rest of their batch is still written.
+    """
+
+    def __init__(self, db_path, handler, maxsize=64, batch_size=32):
+        """
+        Initialize the writer. The thread starts on the first submit.
+
+        Args:
+            db_path (str): Database the batches are committed to.
+            handler (callable): Called with each job inside the batch
+                transaction; returns the written entry or None if the job
+                was skipped.
+            maxsize (int): Maximum number of queued jobs.
+            batch_size (int): Maximum number of jobs per transaction.
+        """
+        self.db_path = db_path
+        self.handler = handler
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.on_written = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.written = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the writer thread if it is not running."""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def submit(self, job, block=False, timeout=None):
+        """
+        Queue a job, by default without blocking the caller.
+
+        Args:
+            job: Arguments for the handler.
+            block (bool): Wait for room in the queue instead of dropping
+                the job, e.g. when replaying archived footage.
+            timeout (float): Longest wait in seconds when blocking, None to
+                wait as long as needed.
+
+        Returns:
+            bool: False if the queue was full and the job was dropped.
+        """
+        self.start()
+        try:
+            self.queue.put(job, block=block, timeout=timeout)
+            return True
+        except queue.Full:
+            self.rejected += 1
+            print("Entries writer queue is full, entry dropped")
+            return False
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                running = False
+                jobs = [job for job in batch if job is not _STOP]
+            else:
+                jobs = batch
+
+            written = []
+            try:
+                sqlConnect = get_connection(self.db_path)
+                with sqlConnect:
+                    # Explicit, so releasing a job's savepoint does not
+                    # commit the batch on its own
+                    sqlConnect.execute("BEGIN")
+                    for job in jobs:
+                        entry = self._write(sqlConnect, job)
+                        if entry is not None:
+                            written.append(entry)
+            except Exception as e:
+                print(f"Error writing entries: {e}")
+                written = []
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+            self.written += len(written)
+            if written and self.on_written is not None:
+                self.on_written(written)
+
+        close_connections()
+
+    def _write(self, sqlConnect, job):
+        # A failing job only rolls back its own savepoint, the rest of the
+        # batch is still committed
+        sqlConnect.execute("SAVEPOINT entry")
+        try:
+            entry = self.handler(job)
+        except Exception as e:
+            sqlConnect.execute("ROLLBACK TO entry")
+            sqlConnect.execute("RELEASE entry")
+            self.failed += 1
+            print(f"Error writing entry: {e}")
+            return None
+        sqlConnect.execute("RELEASE entry")
+        return entry
+
+    def flush(self):
+        """Block until every queued job has been persisted."""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+    def shutdown(self, timeout=5):
+        """
+        Persist the pending jobs and stop the writer thread.
+
+        Args:
+            timeout (float): Seconds to wait for the thread to finish.
+        """
+        if self.thread is None or not self.thread.is_alive():
+            return
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+        self.thread = None
@@ -0,0 +1,88 @@
+# resident_cache.py
+"""
+In-memory cache of the residents table.
+
+The residents table is small and read-mostly, while plate status and owner
+lookups happen for every recognized plate and every table row. The cache
+keeps the whole table in a dictionary keyed by plate number so those
+lookups are dictionary hits; resident writes invalidate it.
+"""
+
+import threading
+import time
+
+from database.db_connection import get_connection
+
+
+class ResidentCache:
+    """
+    Plate-keyed cache of resident status and owner name.
+
+    Attributes:
+        hits (int): Lookups answered from the loaded table.
+        misses (int): Lookups that had to (re)load the table first.
+    """
+
+    def __init__(self, db_path, max_age=60):
+        """
+        Initialize the cache. The table is loaded on first use.
+
+        Args:
+            db_path (str): Path to the residents database.
+            max_age (float): Seconds after which the table is reloaded, so
+                edits made by another process are eventually picked up.
+        """
+        self.db_path = db_path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.residents = None
+        self.loaded_at = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        sqlConnect = get_connection(self.db_path)
+        rows = sqlConnect.execute(
+            "SELECT plateNum, status, fName, lName FROM residents"
+        ).fetchall()
+        self.residents = {plateNum: (status, fName, lName)
+                          for plateNum, status, fName, lName in rows}
+        self.loaded_at = time.monotonic()
+
+    def get(self, plateNumber):
+        """
+        Look up a plate.
+
+        Args:
+            plateNumber (str): License plate number.
+
+        Returns:
+            tuple or None: (status, fName, lName) if the plate is registered.
+        """
+        with self.lock:
+            if (self.residents is None
+                    or time.monotonic() - self.loaded_at > self.max_age):
+                self.misses += 1
+                self._load()
+            else:
+                self.hits += 1
+            return self.residents.get(plateNumber)
+
+    def invalidate(self):
+        """Drop the cached table; the next lookup reloads it."""
+        with self.lock:
+            self.residents = None
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            dict: Hits, misses and the number of cached residents.
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.residents) if self.residents else 0,
+            }
@@ -0,0 +1,173 @@
+# export_models.py
+"""
+Export the plate and char models to ONNX and/or OpenVINO for CPU inference,
+and check the exports against the PyTorch models.
+
+The exports are written next to the ``.pt`` files and used when
+``[MODELCONFIG] device`` in config.ini is ``onnx`` or ``openvino``.
+
+Examples:
+    python export_models.py --format onnx openvino
+    python export_models.py --format openvino --skip-export --check --samples 100
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from ai.models import (
+    EXPORT_FORMATS,
+    exported_path,
+    export_model,
+    get_device,
+    load_model,
+    plate_predict_args,
+)
+from ai.recognition import PlateRecognizer
+from configParams import Parameters
+
+
+def is_char_model(weights):
+    """Return True for char model weights, named best_chars_*.pt."""
+    return "char" in os.path.basename(weights).lower()
+
+
+def load_crops(folder, samples):
+    """
+    Read the plate pictures saved by the application.
+
+    Args:
+        folder (str): Folder with the pictures, e.g. temp/.
+        samples (int): Maximum number of pictures, taken evenly across the
+            sorted file names.
+
+    Returns:
+        list of tuple: (file name, RGB image).
+    """
+    paths = sorted(glob.glob(os.path.join(folder, "*.jpg")))
+    if len(paths) > samples:
+        paths = [paths[i] for i in np.linspace(0, len(paths) - 1, samples).astype(int)]  # noqa
+    crops = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is not None:
+            crops.append((os.path.basename(path), cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))  # noqa
+    return crops
+
+
+def plate_outputs(model, image, params):
+    result = model(image, **plate_predict_args(params, model))[0]
+    boxes = result.boxes.xyxy.cpu().numpy()
+    confidence = result.boxes.conf.cpu().numpy()
+    order = np.argsort(-confidence, kind="stable")
+    return boxes[order], confidence[order], ""
+
+
+def char_outputs(recognizer, model, image):
+    plateText, charDetected, _ = recognizer.recognizeChars([image], model)[0]
+    boxes = np.stack([charDetected[key] for key in ("xmin", "ymin", "xmax", "ymax")], axis=1)  # noqa
+    return boxes, charDetected["confidence"], plateText
+
+
+def check_export(weights, fmt, crops, params, conf_tolerance):
+    """
+    Compare an export with its PyTorch model on the same crops.
+
+    Both run on CPU through the pipeline's own calls. For the char model the
+    recognized strings are compared too.
+
+    Returns:
+        bool: True if every crop gave the same detections within tolerance.
+    """
+    device = get_device("cpu")
+    reference = load_model(weights, device, "cpu")
+    exported = load_model(weights, device, fmt)
+    char = is_char_model(weights)
+    recognizer = PlateRecognizer(params, None)
+
+    def run(model, image):
+        if char:
+            return char_outputs(recognizer, model, image)
+        return plate_outputs(model, image, params)
+
+    mismatches, maxConf, maxBox = [], 0.0, 0.0
+    times = {"pt": 0.0, fmt: 0.0}
+    for name, image in crops:
+        began = time.perf_counter()
+        refBoxes, refConf, refText = run(reference, image)
+        times["pt"] += time.perf_counter() - began
+        began = time.perf_counter()
+        boxes, conf, text = run(exported, image)
+        times[fmt] += time.perf_counter() - began
+
+        if len(conf) != len(refConf) or text != refText:
+            mismatches.append(f"{name}: {refText or len(refConf)} -> {text or len(conf)}")  # noqa
+            continue
+        if len(conf):
+            maxConf = max(maxConf, float(np.abs(conf - refConf).max()))
+            maxBox = max(maxBox, float(np.abs(boxes - refBoxes).max()))
+
+    count = max(len(crops), 1)
+    print(
+        f"{exported_path(weights, fmt)}: {len(crops) - len(mismatches)}/{len(crops)} "  # noqa
+        f"crops agree, max confidence diff {maxConf:.4f}, max box diff {maxBox:.1f} px, "  # noqa
+        f"{times['pt'] / count * 1000:.1f} ms (pt) vs {times[fmt] / count * 1000:.1f} ms ({fmt})"  # noqa
+    )
+    for mismatch in mismatches:
+        print("  mismatch", mismatch)
+    return not mismatches and maxConf <= conf_tolerance
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the YOLO models for ONNX Runtime / OpenVINO."
+    )
+    parser.add_argument("--weights", nargs="+", default=None,
+                        help="PyTorch weights (default: every ./model/*.pt).")
+    parser.add_argument("--format", nargs="+", choices=EXPORT_FORMATS,
+                        default=["onnx"], help="Export formats (default onnx).")
+    parser.add_argument("--skip-export", action="store_true",
+                        help="Only check existing exports.")
+    parser.add_argument("--check", action="store_true",
+                        help="Compare the exports with PyTorch on saved crops.")
+    parser.add_argument("--crops", default="temp",
+                        help="Folder of plate pictures for --check.")
+    parser.add_argument("--samples", type=int, default=50,
+                        help="Crops used by --check (default 50).")
+    parser.add_argument("--conf-tolerance", type=float, default=0.02,
+                        help="Largest confidence difference accepted.")
+    args = parser.parse_args()
+
+    params = Parameters()
+    weights = args.weights or sorted(glob.glob("./model/*.pt"))
+    if not weights:
+        print("No weights found in ./model/")
+        return 1
+
+    if not args.skip_export:
+        for path in weights:
+            imgsz = list(params.char_batch_shape) if is_char_model(path) else params.imgsz  # noqa
+            for fmt in args.format:
+                print(f"Exported {path} to {export_model(path, fmt, imgsz)}")
+
+    if not args.check:
+        return 0
+    crops = load_crops(args.crops, args.samples)
+    if not crops:
+        print(f"No crops found in {args.crops}")
+        return 1
+    equivalent = True
+    for path in weights:
+        for fmt in args.format:
+            equivalent &= check_export(path, fmt, crops, params, args.conf_tolerance)  # noqa
+    print("Exports match PyTorch" if equivalent else "Exports differ from PyTorch")  # noqa
+    return 0 if equivalent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
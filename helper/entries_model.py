@@ -0,0 +1,178 @@
+# entries_model.py
+"""
+Table model for the recent entries shown in the main window.
+
+New entries are prepended as they are written instead of rebuilding the
+whole table, and decoded plate thumbnails are kept between updates, so the
+GUI thread does a constant amount of work per recognized plate.
+"""
+
+from collections import OrderedDict
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSize, Qt
+from PySide6.QtGui import QColor, QIcon, QPixmap
+
+from configParams import getFieldNames
+from helper.gui_maker import get_status_color, get_status_text
+
+STATUS_COLUMN = 0
+PLATE_COLUMN = 1
+TIME_COLUMN = 2
+DATE_COLUMN = 3
+PICTURE_COLUMN = 4
+INFO_COLUMN = 5
+ADD_COLUMN = 6
+
+THUMBNAIL_SIZE = QSize(200, 44)
+
+
+class EntriesTableModel(QAbstractTableModel):
+    """
+    Model holding the latest entries, newest first.
+    """
+
+    def __init__(self, status_lookup, limit=10, max_thumbnails=64, parent=None):
+        """
+        Initialize the model.
+
+        Args:
+            status_lookup (callable): Returns the resident status of a plate.
+            limit (int): Maximum number of entries shown.
+            max_thumbnails (int): Decoded thumbnails kept in memory.
+            parent (QObject): Optional parent object.
+        """
+        super().__init__(parent)
+        self.status_lookup = status_lookup
+        self.limit = limit
+        self.max_thumbnails = max_thumbnails
+        self.rows = []
+        self.thumbnails = OrderedDict()
+        self.headers = getFieldNames(
+            ["status", "plateNum", "time", "date",
+             "platePic", "moreInfo", "addNew"]
+        )
+        self.infoIcon = QIcon("./icons/icons8-info-80.png")
+        self.addIcon = QIcon("./icons/icons8-add-80.png")
+
+    def _makeRow(self, entry):
+        plateNum = entry.getPlateNumber(display=True)
+        return entry, plateNum, self.status_lookup(plateNum)
+
+    def setEntries(self, entries):
+        """
+        Replace every row; decoded thumbnails are kept.
+
+        Args:
+            entries (list of Entries): Entries ordered newest first.
+        """
+        self.beginResetModel()
+        self.rows = [self._makeRow(entry) for entry in entries[:self.limit]]
+        self.endResetModel()
+
+    def prependEntries(self, entries):
+        """
+        Add freshly written entries on top and drop the oldest rows.
+
+        Args:
+            entries (list of Entries): Entries ordered oldest first, as
+                they were inserted.
+        """
+        newRows = [self._makeRow(entry) for entry in reversed(entries)]
+        newRows = newRows[:self.limit]
+        if not newRows:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(newRows) - 1)
+        self.rows[0:0] = newRows
+        self.endInsertRows()
+
+        if len(self.rows) > self.limit:
+            self.beginRemoveRows(QModelIndex(), self.limit, len(self.rows) - 1)
+            del self.rows[self.limit:]
+            self.endRemoveRows()
+
+    def entryAt(self, row):
+        """Get the Entries object shown in a row."""
+        return self.rows[row][0]
+
+    def plateAt(self, row):
+        """Get the display plate number of a row."""
+        return self.rows[row][1]
+
+    def statusAt(self, row):
+        """Get the resident status of a row."""
+        return self.rows[row][2]
+
+    def thumbnail(self, entry):
+        """
+        Get the scaled plate picture of an entry, decoding it only once.
+
+        Args:
+            entry (Entries): The entry.
+
+        Returns:
+            QPixmap: The thumbnail (null if the picture is missing).
+        """
+        path = entry.getPlatePic()
+        pixmap = self.thumbnails.get(path)
+        if pixmap is not None:
+            self.thumbnails.move_to_end(path)
+            return pixmap
+
+        pixmap = QPixmap(path)
+        if not pixmap.isNull():
+            pixmap = pixmap.scaled(THUMBNAIL_SIZE, Qt.IgnoreAspectRatio,
+                                   Qt.SmoothTransformation)
+            self.thumbnails[path] = pixmap
+            if len(self.thumbnails) > self.max_thumbnails:
+                self.thumbnails.popitem(last=False)
+        return pixmap
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry, plateNum, status = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == STATUS_COLUMN:
+                return get_status_text(status)
+            if column == PLATE_COLUMN:
+                return plateNum
+            if column == TIME_COLUMN:
+                return entry.getTime()
+            if column == DATE_COLUMN:
+                return entry.getDate()
+        elif role == Qt.BackgroundRole and column == STATUS_COLUMN:
+            r, g, b = get_status_color(status)
+            return QColor(r, g, b)
+        elif role == Qt.DecorationRole:
+            if column == PICTURE_COLUMN:
+                return self.thumbnail(entry)
+            if column == INFO_COLUMN:
+                return self.infoIcon
+            if column == ADD_COLUMN:
+                return self.addIcon
+        elif role == Qt.SizeHintRole and column == PICTURE_COLUMN:
+            return THUMBNAIL_SIZE
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        status = self.rows[index.row()][2]
+        # Unregistered plates can be added but have no resident info
+        if (index.column() == INFO_COLUMN and status == 2) or (
+            index.column() == ADD_COLUMN and status != 2
+        ):
+            flags &= ~Qt.ItemIsEnabled
+        return flags
@@ -137,32 +137,19 @@ def configure_edit_table_widget(self):
 
 def configure_main_table_widget(self):
     """
-    Configures the main table widget.
+    Configures the main table view. Headers come from its model.
     """
-    fieldsList = [
-        "status",
-        "plateNum",
-        "time",
-        "date",
-        "platePic",
-        "moreInfo",
-        "addNew",
-    ]
-    fieldsList = getFieldNames(fieldsList)
-
-    self.tableWidget.setColumnCount(len(fieldsList))
-    self.tableWidget.setRowCount(20)
-    self.tableWidget.setHorizontalHeaderLabels(fieldsList)
     self.tableWidget.horizontalHeader().setSectionResizeMode(
         QtWidgets.QHeaderView.ResizeToContents
     )
+    self.tableWidget.verticalHeader().setDefaultSectionSize(60)
     # Changed from RightToLeft
     self.tableWidget.setLayoutDirection(Qt.LeftToRight)
-    self.tableWidget.setSortingEnabled(True)
+    self.tableWidget.setIconSize(QSize(24, 24))
 
     delegate = CenterAlignDelegate(self.tableWidget)
     self.tableWidget.setItemDelegate(delegate)
-    self.tableWidget.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+    self.tableWidget.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)  # noqa: E501
     self.tableWidget.setSelectionMode(QAbstractItemView.SingleSelection)
     self.tableWidget.setSelectionBehavior(QAbstractItemView.SelectRows)
 
@@ -234,6 +221,13 @@ def on_label_double_click(event, source_object=None):
     """
     Handles double-click event on label to show image in a dialog.
     """
+    show_plate_image(source_object.pixmap())
+
+
+def show_plate_image(pixmap):
+    """
+    Shows a plate picture in a dialog.
+    """
     w = QDialog()
     w.setFixedSize(600, 132)
     w.setWindowTitle("License Plate View")  # Changed from RegValidator
@@ -242,7 +236,7 @@ def on_label_double_click(event, source_object=None):
     imageLabel.setText("")
     imageLabel.setScaledContents(True)
     imageLabel.setFixedSize(600, 132)
-    imageLabel.setPixmap(source_object.pixmap())
+    imageLabel.setPixmap(pixmap)
 
     layout = QVBoxLayout()
     layout.addWidget(imageLabel)
@@ -0,0 +1,34 @@
+# startup_timer.py
+"""
+Wall-clock timing of the application startup, printed phase by phase.
+"""
+
+import time
+
+
+class PhaseTimer:
+    """
+    Prints how long each startup phase took.
+
+    Attributes:
+        name (str): Prefix of the printed lines.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started = self.last = time.perf_counter()
+
+    def phase(self, label):
+        """
+        Print the time since the previous phase ended.
+
+        Args:
+            label (str): What the phase did.
+        """
+        now = time.perf_counter()
+        print(f"[{self.name}] {label}: {now - self.last:.2f} s")
+        self.last = now
+
+    def total(self):
+        """Print the time since the timer was created."""
+        print(f"[{self.name}] total: {time.perf_counter() - self.started:.2f} s")  # noqa
@@ -12,40 +12,58 @@ Requirements:
 - Pillow for image processing
 - OpenCV for video and image manipulation
 - NumPy for numerical operations
+
+torch and ultralytics are only imported by the background model loader,
+so the window shows up without waiting for them.
 """
-from ultralytics import YOLO
-import pandas as pd
-import functools
-import gc
-import statistics
 import time
+from helper.startup_timer import PhaseTimer
+
+startupTimer = PhaseTimer("startup")
+
+import os
+import threading
 import warnings
 from pathlib import Path
 import cv2
-import torch
-from PIL import ImageOps
 from PySide6 import QtWidgets, QtCore
 from PySide6.QtCore import QThread, Signal, QSize
 from PySide6.QtGui import QImage, QIcon, QAction, QPainter, QPixmap
-from PySide6.QtWidgets import QTableWidgetItem, QGraphicsScene
+from PySide6.QtWidgets import QGraphicsScene
 from qtpy.uic import loadUi
 
-from ai.img_model import calculate_homography_and_warp, draw_fps, to_img_opencv, to_img_pil  # noqa
+startupTimer.phase("import Qt and OpenCV")
+
+from ai.frame_grabber import FrameGrabber
+from ai.frame_pool import FramePool
+from ai.img_model import draw_fps
+from ai.inference_scheduler import InferenceScheduler
+from ai.model_registry import ModelRegistry
+from ai.recognition import PlateRecognizer, is_valid_reading
 from configParams import Parameters
-from database.db_entries_utils import db_entries_time, dbGetAllEntries
+
+startupTimer.phase("import recognition pipeline")
+
+from database.db_connection import close_connections
+from database.db_entries_utils import db_entries_time, dbGetAllEntries, entriesWriter  # noqa
 from database.db_resident_utils import (
     db_get_plate_status,
     db_get_plate_owner_name,  # type: ignore
+    residentCache,
 )
 from enteries_window import EnteriesWindow
+from helper.entries_model import (
+    ADD_COLUMN,
+    INFO_COLUMN,
+    PICTURE_COLUMN,
+    EntriesTableModel,
+)
 from helper.gui_maker import (
     configure_main_table_widget,
-    create_image_label,
-    on_label_double_click,
+    show_plate_image,
     center_widget,
     get_status_text,
     get_status_color,
-    create_styled_button,
 )
 from helper.text_decorators import convert_to_local_format
 from resident_view import residentView
@@ -54,17 +72,8 @@ from residents_main import residentsWindow
 from settings_window import SettingsWindow
 
 import sys
-from torch.nn import Conv2d, Upsample, BatchNorm2d
-from ultralytics.nn.tasks import DetectionModel
-from ultralytics.nn.modules.conv import Conv, Concat, DWConv, RepConv
-from ultralytics.nn.modules.block import C2f, SPPF, Bottleneck, DFL, RepNCSPELAN4, RepCSP, RepBottleneck, ADown, SPPELAN, C3k2
-from ultralytics.nn.modules.head import Detect
-import torch.serialization
-from torch.nn.modules.activation import SiLU
-from torch.nn.modules.container import ModuleList
-from torch.nn.modules.pooling import MaxPool2d
-from torch.nn.modules.linear import Identity
-from torch import nn
+
+startupTimer.phase("import database and windows")
 
 warnings.filterwarnings("ignore", category=UserWarning)
 params = Parameters()
@@ -72,62 +81,8 @@ params = Parameters()
 sys.path.append("model")
 
 
-def get_device():
-    """
-    Determines the device to run the PyTorch models on.
-    Returns a torch.device object representing the device (CUDA, MPS, or CPU).
-    """
-    if torch.cuda.is_available():
-        print("cuda is available")
-        return torch.device("cuda")
-    elif torch.backends.mps.is_available():
-        print("mps is available")
-        return torch.device("mps")
-    else:
-        print("cpu is available")
-        return torch.device("cpu")
-
-
-device = get_device()
-
-try:
-    # modelPlate = torch.hub.load('model', 'custom', params.modelPlate_path, source='local', force_reload=True)
-    torch.serialization.add_safe_globals([
-        nn.Sequential,
-        DetectionModel,
-        Conv,
-        Conv2d,
-        C2f,
-        SPPF,
-        Upsample,
-        Concat,
-        Detect,
-        BatchNorm2d,
-        Bottleneck,
-        MaxPool2d,
-        DWConv,
-        DFL,
-        RepNCSPELAN4,
-        RepCSP,
-        RepBottleneck,
-        RepConv,
-        Identity,
-        ADown,
-        SPPELAN,
-        C3k2
-    ])
-    torch.serialization.add_safe_globals([SiLU,ModuleList])
-    modelPlate = YOLO(params.modelPlate_path, verbose=False).to(device)
-    print(f"Model used: {params.modelPlate_path}")
-    # modelPlate = modelPlate.to(device())
-
-    # modelCharX = torch.hub.load('model', 'custom', params.modelCharX_path, source='local', force_reload=True)  # noqa
-    modelCharX = YOLO(params.modelCharX_path, verbose=False).to(device)
-    print("Models loaded successfully")
-
-except Exception as e:
-    print("Error loading the model")
-    print("Error description: ", e)
+# The models in use; loaded in the background and swapped between frames
+modelRegistry = ModelRegistry(params)
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -136,6 +91,10 @@ class MainWindow(QtWidgets.QMainWindow):
     It sets up the user interface and connects signals and slots.
     """
 
+    entriesWritten = Signal(list)
+    modelsReady = Signal(str, str)
+    modelsFailed = Signal(str)
+
     def __init__(self):
         """
         Initializes the main window and its components.
@@ -161,10 +120,6 @@ class MainWindow(QtWidgets.QMainWindow):
             self.open_settings_window
         )  # Conectar el botón settingsButton
 
-        self.last_detection_time = 0
-        self.detection_cooldown = 0.05  # 500ms cooldown
-        # print(f"Detection cooldown: {self.detection_cooldown}")
-
         exitAct = QAction("Exit", self)
         exitAct.setShortcut("Ctrl+Q")
 
@@ -195,116 +150,77 @@ class MainWindow(QtWidgets.QMainWindow):
         self.Worker1.plateDataUpdate.connect(self.on_plate_data_update)
         self.Worker1.mainViewUpdate.connect(self.on_main_view_update)
 
+        self.entriesModel = EntriesTableModel(db_get_plate_status, limit=10)
+        self.tableWidget.setModel(self.entriesModel)
+        self.tableWidget.clicked.connect(self.on_table_clicked)
+        configure_main_table_widget(self)
+
+        # Start only enables once the models are loaded in the background
+        self.startButton.setEnabled(False)
+        self.startButton.setToolTip("Loading models...")
+        self.modelsReady.connect(self.on_models_ready)
+        self.modelsFailed.connect(self.on_models_failed)
+        modelRegistry.on_ready = self.modelsReady.emit
+        modelRegistry.on_error = self.modelsFailed.emit
+        # Started from the event loop, after the window is first painted
+        QtCore.QTimer.singleShot(0, lambda: modelRegistry.load(
+            params.modelPlate_path, params.modelCharX_path
+        ))
+
         self.Worker2 = Worker2()
         self.Worker2.mainTableUpdate.connect(self.refresh_table)
         self.Worker2.start()
 
-        configure_main_table_widget(self)
+        # Entries are persisted on a background thread and prepended to the
+        # table once written
+        self.entriesWritten.connect(self.on_entries_written)
+        entriesWriter.on_written = self.entriesWritten.emit
+
+        # One pixmap item is reused for every frame; the view settings are
+        # fixed, so they are applied only once here
         self.scene = QGraphicsScene()
+        self.videoItem = self.scene.addPixmap(QPixmap())
         self.gv.setScene(self.scene)
-
-        torch.cuda.empty_cache()
-        gc.collect()
+        self.gv.setRenderHints(QPainter.Antialiasing)
+        self.gv.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.gv.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+
+    def on_models_ready(self, plate_path, char_path):
+        print(f"Model Plate in use: {plate_path}")
+        print("Model Char in use:", char_path)
+        self.startButton.setToolTip("")
+        if not self.startButton.isEnabled():
+            self.startButton.setEnabled(True)
+            startupTimer.total()
+
+    def on_models_failed(self, error):
+        # The previous models, if any, stay in use; the settings window can
+        # still load another pair
+        if not modelRegistry.ready():
+            self.startButton.setToolTip(f"Error loading the model: {error}")
 
     def refresh_table(self, plateNum=""):
-        # print("\n=== INICIO DE REFRESH_TABLE ===")
-        # print(f"Parámetro plateNum recibido: {plateNum}")
-
-        # Get all entries from the database
-        plateNum = dbGetAllEntries(limit=10, whereLike=plateNum)
-        # print(f"Número de registros obtenidos de la base de datos: {len(plateNum)}")  # noqa
-
-        # Set the number of rows
-        self.tableWidget.setRowCount(len(plateNum))
-        # print(f"Tabla configurada con {len(plateNum)} filas")
-
-        # Establecer altura para todas las filas
-        for row in range(self.tableWidget.rowCount()):
-            self.tableWidget.setRowHeight(row, 60)
-
-        # Iterate through entries
-        for index, entry in enumerate(plateNum):
-            # print(f"\n--- Procesando entrada {index + 1} ---")
-
-            # Get plate number in English
-            original_plate = entry.getPlateNumber(display=True)
-            # print(f"Número de placa original: {original_plate}")
-
-            plateNum2 = original_plate
-            # print(f"Número de placa convertido: {plateNum2}")
-
-            # Get status
-            statusNum = db_get_plate_status(plateNum2)
-            # print(f"Estado de la placa: {statusNum}")
-
-            # Set table items
-            # print("\nActualizando campos de la tabla:")
-            # print(f"Estado: {entry.getStatus(statusNum=statusNum)}")
-            # print(f"Placa: {entry.getPlateNumber(display=True)}")
-            # print(f"Hora: {entry.getTime()}")
-            # print(f"Fecha: {entry.getDate()}")
-
-            self.tableWidget.setItem(
-                index, 0, QTableWidgetItem(entry.getStatus(statusNum=statusNum))  # noqa
-            )
-            self.tableWidget.setItem(
-                index, 1, QTableWidgetItem(entry.getPlateNumber(display=True))
-            )
-            self.tableWidget.setItem(
-                index, 2, QTableWidgetItem(entry.getTime())
-            )  # noqa
-            self.tableWidget.setItem(
-                index, 3, QTableWidgetItem(entry.getDate())
-            )  # noqa
-
-            # Load the plate picture
-            img_path = entry.getPlatePic()
-            # print(f"[DEBUG] Loading image from: {img_path}")
-
-            Image = QImage()
-            if Image.load(img_path):
-                # print(f"[DEBUG] Image loaded successfully")
-                QcroppedPlate = QPixmap.fromImage(Image)
-                item = create_image_label(QcroppedPlate)
-                item.mousePressEvent = functools.partial(
-                    on_label_double_click, source_object=item
-                )
-                self.tableWidget.setCellWidget(index, 4, item)
-
-            # Create buttons
-            # print("\nCreando botones...")
-            infoBtnItem = create_styled_button("info")
-            infoBtnItem.mousePressEvent = functools.partial(
-                self.on_info_button_clicked, source_object=infoBtnItem
-            )
-            self.tableWidget.setCellWidget(index, 5, infoBtnItem)
-
-            addBtnItem = create_styled_button("add")
-            addBtnItem.mousePressEvent = functools.partial(
-                self.on_add_button_clicked, source_object=addBtnItem
-            )
-            self.tableWidget.setCellWidget(index, 6, addBtnItem)
-            addBtnItem.setEnabled(False)
-
-            # Handle button states
-            if statusNum == 2:
-                # print("Estado 2 detectado: Habilitando botón de agregar y deshabilitando botón de info")  # noqa
-                addBtnItem.setEnabled(True)
-                infoBtnItem.setEnabled(False)
-
-        # print("\n=== FIN DE REFRESH_TABLE ===")
-
-    def on_info_button_clicked(self, event, source_object=None):
-        r = self.tableWidget.currentRow()
-        field1 = self.tableWidget.item(r, 1)
-        residentView(residnetPlate=field1.text()).exec()
-
-    def on_add_button_clicked(self, event, source_object=None):
-        r = self.tableWidget.currentRow()
-        field1 = self.tableWidget.item(r, 1)
-        # print(f"Placa seleccionada: {field1.text()}")
+        # Get the latest entries from the database; the model keeps the
+        # thumbnails it has already decoded
+        self.entriesModel.setEntries(dbGetAllEntries(limit=10, whereLike=plateNum))  # noqa
+
+    def on_table_clicked(self, index):
+        row = index.row()
+        status = self.entriesModel.statusAt(row)
+        if index.column() == PICTURE_COLUMN:
+            show_plate_image(QPixmap(self.entriesModel.entryAt(row).getPlatePic()))  # noqa
+        elif index.column() == INFO_COLUMN and status != 2:
+            self.on_info_button_clicked(row)
+        elif index.column() == ADD_COLUMN and status == 2:
+            self.on_add_button_clicked(row)
+
+    def on_info_button_clicked(self, row):
+        residentView(residnetPlate=self.entriesModel.plateAt(row)).exec()
+
+    def on_add_button_clicked(self, row):
+        # print(f"Placa seleccionada: {self.entriesModel.plateAt(row)}")
         residentAddWindow = residentsAddNewWindow(
-            self, isNew=True, residnetPlate=field1.text()
+            self, isNew=True, residnetPlate=self.entriesModel.plateAt(row)
         )
         residentAddWindow.exec()
         self.refresh_table()
@@ -314,6 +230,9 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.residentsWindow is not None and self.enterieswindow is not None:  # noqa
             self.residentsWindow.close()
             self.enterieswindow.close()  # TODO if not openned any window will crash  # noqa
+        print("Resident cache:", residentCache.stats())
+        entriesWriter.shutdown()
+        close_connections()
         event.accept()
 
     def show_residents_list(self):
@@ -327,14 +246,20 @@ class MainWindow(QtWidgets.QMainWindow):
         center_widget(enterieswindow)
         enterieswindow.exec()
 
-    def on_main_view_update(self, mainViewImage):
-
-        qp = QPixmap.fromImage(mainViewImage)
-
-        self.scene.addPixmap(qp)
-        self.scene.setSceneRect(0, 0, 960, 540)
-        self.gv.fitInView(self.scene.sceneRect())
-        self.gv.setRenderHints(QPainter.Antialiasing)
+    def on_main_view_update(self, mainViewImage, slot):
+        # The image borrows a pooled buffer of Worker1; hand it back once
+        # it has been uploaded into the pixmap
+        self.videoItem.setPixmap(QPixmap.fromImage(mainViewImage))
+        self.Worker1.framePool.release(slot)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # The view only has its final size once the window is shown. Worker1
+        # downscales frames to it, so the view paints them 1:1.
+        viewSize = self.gv.viewport().size()
+        self.Worker1.viewSize = (viewSize.width(), viewSize.height())
+        self.scene.setSceneRect(0, 0, viewSize.width(), viewSize.height())
+        self.gv.resetTransform()
 
     def on_plate_data_update(
         self,
@@ -342,66 +267,67 @@ class MainWindow(QtWidgets.QMainWindow):
         plate_text: str,
         char_conf_avg: float,
         plate_conf_avg: float,
+        camera: str = "",
     ) -> None:
 
-        current_time = time.time()
         plate_text = convert_to_local_format(plate_text[:], display=True)
 
         # Check if the plate text is 6 characters long and the character confidence is above 70  # noqa
-        if (
-            len(plate_text) == 6 and char_conf_avg >= 70 and plate_text[-3:].isdigit()  # noqa
-        ):  # noqa
-            if (
-                current_time - self.last_detection_time >= self.detection_cooldown  # noqa
-            ):  # noqa
-                self.last_detection_time = current_time
-                # print(f"Placa detectada adentro del if: {plate_text}")
-
-                # Set the plate view to display the cropped plate
-                scaled_plate = cropped_plate.scaled(
-                    300,
-                    66,
-                    QtCore.Qt.KeepAspectRatio,
-                    QtCore.Qt.SmoothTransformation,  # noqa
+        if is_valid_reading(plate_text, char_conf_avg):
+            # Every passage is emitted once, readings of several plates or
+            # cameras in the same round arrive back to back; repeats of a
+            # plate are deduplicated per camera when they are stored
+
+            # print(f"Placa detectada adentro del if: {plate_text}")
+
+            # Set the plate view to display the cropped plate
+            scaled_plate = cropped_plate.scaled(
+                300,
+                66,
+                QtCore.Qt.KeepAspectRatio,
+                QtCore.Qt.SmoothTransformation,  # noqa
+            )
+            # Set the plate view
+            self.plate_view.setPixmap(QPixmap.fromImage(scaled_plate))
+
+            # Set the plate text
+            plt_text_num = plate_text
+
+            self.plate_text_num.setText(plt_text_num)
+
+            # Clean the plate text and get the status from the database
+            plate_text_clean = plt_text_num
+            status = db_get_plate_status(plt_text_num)
+
+            # Update the plate owner and permission
+            self.update_plate_owner(
+                db_get_plate_owner_name(plate_text_clean)
+            )  # noqa
+            self.update_plate_permission(status)
+
+            # Create data for send into services
+            external_service_data = {
+                "plate_number": plt_text_num,
+                "image": cropped_plate,
+            }
+
+            # print(f"[DEBUG] Enviando imagen con tamaño: {cropped_plate.width()}x{cropped_plate.height()}")  # noqa
+            # Add the plate text, character confidence, plate confidence,
+            # cropped plate, and status to the database
+            # print(f"Placa detectada: {plt_text_num}")
+            if len(plt_text_num) == 6:
+                db_entries_time(
+                    plt_text_num,
+                    char_conf_avg,
+                    plate_conf_avg,
+                    cropped_plate,
+                    status,
+                    external_service_data=external_service_data,
+                    camera=camera,
                 )
-                # Set the plate view
-                self.plate_view.setPixmap(QPixmap.fromImage(scaled_plate))
-
-                # Set the plate text
-                plt_text_num = plate_text
-
-                self.plate_text_num.setText(plt_text_num)
-
-                # Clean the plate text and get the status from the database
-                plate_text_clean = plt_text_num
-                status = db_get_plate_status(plt_text_num)
-
-                # Update the plate owner and permission
-                self.update_plate_owner(
-                    db_get_plate_owner_name(plate_text_clean)
-                )  # noqa
-                self.update_plate_permission(status)
-
-                # Create data for send into services
-                external_service_data = {
-                    "plate_number": plt_text_num,
-                    "image": cropped_plate,
-                }
-
-                # print(f"[DEBUG] Enviando imagen con tamaño: {cropped_plate.width()}x{cropped_plate.height()}")  # noqa
-                # Add the plate text, character confidence, plate confidence,
-                # cropped plate, and status to the database
-                # print(f"Placa detectada: {plt_text_num}")
-                if len(plt_text_num) == 6:
-                    db_entries_time(
-                        plt_text_num,
-                        char_conf_avg,
-                        plate_conf_avg,
-                        cropped_plate,
-                        status,
-                        external_service_data=external_service_data,
-                    )
-                self.Worker2.start()
+
+    def on_entries_written(self, entries):
+        self.entriesModel.prependEntries(entries)
 
     def update_plate_owner(self, name):
         if name:
@@ -456,16 +382,9 @@ class MainWindow(QtWidgets.QMainWindow):
             print("El modelo de caracteres actual es:", new_model_Char)
             params.modelCharX_path = new_model_Char
 
-            try:
-                global modelPlate   # Se actualiza la variable global del modelo
-                modelPlate = YOLO(params.modelPlate_path, verbose=False).to(device)
-                print(f"Model Plate used in open settings: {params.modelPlate_path}")
-                
-                global modelCharX
-                modelCharX = YOLO(params.modelCharX_path, verbose=False).to(device) # Se actualiza el modelo de caracteres
-                print("Model Char used in open settings:", params.modelCharX_path)
-            except Exception as e:
-                print("Error al recargar el modelo YOLO:", e)  
+            # Se cargan en segundo plano; el reconocimiento sigue con los
+            # modelos actuales hasta que los nuevos estén listos
+            modelRegistry.load(params.modelPlate_path, params.modelCharX_path)
 
 
 class Worker1(QThread):
@@ -474,147 +393,137 @@ class Worker1(QThread):
     It is responsible for detecting plates and recognizing characters.
     """
 
-    mainViewUpdate = Signal(QImage)
-    plateDataUpdate = Signal(QImage, list, int, int)
-    TotalFramePass = 0
+    mainViewUpdate = Signal(QImage, int)
+    plateDataUpdate = Signal(QImage, list, int, int, str)
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Size frames are downscaled to before display, set by MainWindow
+        self.viewSize = (960, 540)
+        # Display buffers owned by the GUI until it releases them
+        self.framePool = FramePool((540, 960, 3))
+        # One recognition pipeline per camera, all sharing the models. They
+        # are looked up on every round, so a swap in the settings window
+        # applies from the next one
+        self.recognizers = {
+            camera["id"]: PlateRecognizer(params, modelRegistry.current)
+            for camera in params.cameras
+        }
+        self.scheduler = InferenceScheduler(self.recognizers, modelRegistry.current)
+        # The main view shows the first camera
+        self.viewCamera = params.cameras[0]["id"]
+        # Frame each video file camera reached, to resume from there
+        self.framePositions = {}
 
     def run(self):
         self.prepare_capture()
-        while self.ThreadActive:
-            success, frame = self.Capture.read()
-            if success:
-                self.process_frame(frame)
+        while self.ThreadActive and any(
+            grabber.is_alive() for grabber in self.Grabbers.values()
+        ):
+            # Woken by whichever camera delivers first; the newest frame of
+            # every camera then goes into the same round
+            self.frameReady.wait(timeout=1.0)
+            self.frameReady.clear()
+            frames = {}
+            for camId, grabber in self.Grabbers.items():
+                frame = grabber.read_latest(timeout=0)
+                if frame is not None:
+                    frames[camId] = frame
+            if frames:
+                self.process_frames(frames)
                 self.manageFrameRate()
+        self.release_capture()
 
     def prepare_capture(self):
         self.prev_frame_time = 0
         self.ThreadActive = True
 
         """
-        # you can change 0 in >>>cv2.VideoCapture(0)<<< (which is webcam) to params.video  # noqa
-        # and it will read the config.ini >>> video = anpr_video.mp4
-        # you should add your file path instead of anpr_video.mp4
-        # if you want to use stream just replace your address in config.ini 
-        >>> rtps = rtsp://172.17.0.1:8554/webCamStream
+        # The cameras come from the [CAMERA:<id>] sections of config.ini,
+        # each with a video file, a stream address or a webcam index:
+        >>> [CAMERA:entry]
+        >>> source = rtsp://172.17.0.1:8554/webCamStream
+        # without them the config.ini video is the only camera
         """
-        self.Capture = cv2.VideoCapture(
-            params.video
-        )  # (params.rtps)  # 0 -> use for local webcam
-        self.adjust_video_position()
-
-    def adjust_video_position(self):
-        if params.source == "video":
-            total = int(self.Capture.get(cv2.CAP_PROP_FRAME_COUNT))
-            self.TotalFramePass = (
-                0 if self.TotalFramePass > total else self.TotalFramePass
+        self.frameReady = threading.Event()
+        self.Grabbers = {}
+        self.videoFiles = set()
+        for camera in params.cameras:
+            camId, source = camera["id"], camera["source"]
+            capture = cv2.VideoCapture(source)
+            isVideoFile = isinstance(source, str) and os.path.isfile(source)
+            if isVideoFile:
+                self.videoFiles.add(camId)
+                self.adjust_video_position(camId, capture)
+
+            self.recognizers[camId].reset()
+
+            # Capture runs on its own thread and keeps only the newest
+            # frames, so inference always works on the latest picture of
+            # the gate.
+            self.Grabbers[camId] = FrameGrabber(
+                capture,
+                buffer_size=params.frame_buffer_size,
+                realtime=isVideoFile,
+                frame_event=self.frameReady,
+            ).start()
+
+    def release_capture(self):
+        for camId, grabber in self.Grabbers.items():
+            position = grabber.stop()
+            for reading in self.recognizers[camId].flush():
+                self.emitReading(camId, reading)
+            if camId in self.videoFiles:
+                self.framePositions[camId] = position
+            stats = grabber.stats()
+            print(
+                "Camera {camId}: frames grabbed: {grabbed}, "
+                "processed: {processed}, dropped: {dropped}".format(camId=camId, **stats)  # noqa
             )
-            self.Capture.set(1, self.TotalFramePass)
-
-    def process_frame(self, frame):
-        self.TotalFramePass += 1
-        resize = self.prepareImage(frame)
-        resize = cv2.cvtColor(resize, cv2.COLOR_BGR2RGB)
-        platesResult = modelPlate(
-            resize,
-            verbose=False,
-            show=False,
-        )[0]
-        resize = cv2.cvtColor(resize, cv2.COLOR_BGR2RGB)
-
-        # Coords [xmin, ymin, xmax, ymax]
-        xyxy = platesResult.boxes.xyxy.cpu().numpy()
-        confidence = platesResult.boxes.conf.cpu().numpy()  # Confidence score
-
-        platesResult_df = pd.DataFrame(xyxy,
-                                       columns=["xmin", "ymin", "xmax", "ymax"]
-                                       )
-        platesResult_df["confidence"] = confidence
-
-        plate_th = 60
-        for _, plate in platesResult_df.iterrows():
-            plateConf = int(plate["confidence"] * 100)
-            # print("Confidence in prediction: ", plateConf, "%")
-            if plateConf >= plate_th:
-                croppedPlate = self.cropPlate(resize, plate)
-                plateText, char_detected, charConfAvg = self.detectPlateChars(
-                    croppedPlate
-                )
-                plateText = self.correctPlateText(plateText)
-                # print("Plate detected: ", plateText)
-                self.emitPlateData(
-                    croppedPlate,
-                    plateText,
-                    char_detected,
-                    charConfAvg,
-                    plateConf,  # noqa
-                )
-                self.highlightPlate(resize, plate)
-
-        self.emitFrame(resize)
-
-    def correctPlateText(self, plateText: str):
-
-        text = plateText[:3]
-        wrongText = ["0", "1", "6", "8"]
-        for char in text:
-            if char in wrongText:
-                text = text.replace(char, params.rectification_text_dict[char])
-        nums = plateText[3:]
-        wrongNums = ["O", "I", "G", "B"]
-        for num in nums:
-            if num in wrongNums:
-                nums = nums.replace(num, params.rectification_nums_dict[num])
-
-        correctedPlateText = "".join([text, nums])
-        return correctedPlateText
-
-    def prepareImage(self, frame):
-        resize = cv2.resize(frame, (960, 540))
-        effect = ImageOps.autocontrast(to_img_pil(resize), cutoff=1)
-        return cv2.cvtColor(to_img_opencv(effect), cv2.COLOR_BGR2RGB)
-
-    def highlightPlate(self, resize, plate):
-        moreSpace = 3
-        cv2.rectangle(
-            resize,
-            (int(plate["xmin"]) - moreSpace, int(plate["ymin"]) - moreSpace),
-            (int(plate["xmax"]) + moreSpace, int(plate["ymax"]) + moreSpace),
-            color=(0, 0, 255),
-            thickness=3,
+            self.recognizers[camId].printStats()
+        print(
+            "Inference rounds: {rounds}, camera frames: {frames}, "
+            "frames per round: {frames_per_round:.2f}".format(**self.scheduler.stats())  # noqa
         )
 
-    def cropPlate(self, resize, plate):
-        y1 = plate["ymin"]
-        y2 = plate["ymax"]
-        x1 = plate["xmin"]
-        x2 = plate["xmax"]
-        factor = 0.25
-        more_width = int((x2-x1)*factor)
-        more_height = int((y2-y1)*factor*2)
-        if x1-more_width < 0 or x2+more_width > resize.shape[1]:
-            more_width = 0
-        if y1-more_height < 0 or y2+more_height > resize.shape[0]:
-            more_height = 0
-
-        # print("Added width: ", more_width*2)
-        # print("Added height: ", more_height*2)
-        return resize[int(y1-more_height): int(y2+more_height),
-                      int(x1-more_width): int(x2+more_width)]
+    def adjust_video_position(self, camId, capture):
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        position = self.framePositions.get(camId, 0)
+        capture.set(1, 0 if position > total else position)
+
+    def process_frames(self, frames):
+        results = self.scheduler.process(frames)
+        for camId, (resize, readings) in results.items():
+            for reading in readings:
+                self.emitReading(camId, reading)
+            if camId == self.viewCamera:
+                self.emitFrame(resize)
+
+    def emitReading(self, camId, reading):
+        self.emitPlateData(
+            reading.croppedPlate,
+            reading.plate,
+            reading.plateText,
+            reading.charDetected,
+            reading.charConfAvg,
+            camId,
+        )
 
     def emitPlateData(
-        self, croppedPlate, plateText, char_detected, charConfAvg, plateConf
+        self, croppedPlate, plate, plateText, char_detected, charConfAvg,
+        camId="",
     ):
+        plateConf = int(plate["confidence"] * 100)
         croppedPlate = cv2.resize(croppedPlate, (600, 132))
+        # Copied so the queued signal owns its pixels
         croppedPlateImage = QImage(
             croppedPlate.data,
             croppedPlate.shape[1],
             croppedPlate.shape[0],
+            croppedPlate.strides[0],
             QImage.Format_RGB888,
-        )
-        self.plateDataUpdate.emit(croppedPlateImage, plateText, charConfAvg, plateConf)  # noqa
+        ).copy()
+        self.plateDataUpdate.emit(croppedPlateImage, plateText, charConfAvg, plateConf, camId)  # noqa
 
     def manageFrameRate(self):
         new_frame_time = time.time()
@@ -629,51 +538,21 @@ class Worker1(QThread):
         # Check if currentFPS has been calculated  # noqa
         if hasattr(self, "currentFPS"):
             draw_fps(resize, self.currentFPS)  # Draw FPS on the frame
+
+        width, height = self.viewSize
+        slot = self.framePool.acquire((height, width, 3))
+        if slot is None:
+            return  # The GUI still holds every buffer, skip this frame
+        # Downscale straight into the pooled buffer; the QImage borrows it
+        # and the GUI releases the slot once it has drawn the frame
+        viewFrame = self.framePool.buffers[slot]
+        cv2.resize(resize, (width, height), dst=viewFrame,
+                   interpolation=cv2.INTER_AREA)
         mainFrame = QImage(
-            resize.data, resize.shape[1], resize.shape[0], QImage.Format_RGB888
+            viewFrame.data, width, height, viewFrame.strides[0],
+            QImage.Format_RGB888,
         )
-        self.mainViewUpdate.emit(mainFrame)
-
-    def detectPlateChars(self, croppedPlate):
-        chars, confidences, char_detected = [], [], []
-        if params.set_homography:
-            if params.set_homography_manual:
-                apply_homography = calculate_homography_and_warp(
-                    croppedPlate, params.src_points_manual
-                )
-
-            apply_homography = calculate_homography_and_warp(croppedPlate)
-            if apply_homography is not None:
-                croppedPlate = apply_homography
-
-        results = modelCharX(croppedPlate, verbose=False, show=False, save=False)[0]  # noqa
-        char_id_dict1 = results.names
-
-        # To CPU to use numpy
-        boxes = results.boxes.xyxy.cpu().numpy()
-        # Predicted class
-        predictions = results.boxes.cls.cpu().numpy()
-        # Confidence on predictions
-        confidence = results.boxes.conf.cpu().numpy()
-
-        detections = [
-            (box, pred, conf) for box, pred, conf in zip(boxes, predictions, confidence)  # noqa
-        ]
-        detections_sorted = sorted(detections, key=lambda x: x[0][0])
-        chars_th = 0.5
-
-        for det in detections_sorted:
-            conf = det[2]
-            if conf > chars_th:
-                cls = det[1]
-                char = char_id_dict1.get(int(cls))
-                chars.append(char)
-                confidences.append(conf)
-                char_detected.append(list(det))  # Char position
-
-        # print("Plate detected: ", ''.join(chars))
-        charConfAvg = round(statistics.mean(confidences) * 100) if confidences else 0  # noqa
-        return "".join(chars), char_detected, charConfAvg
+        self.mainViewUpdate.emit(mainFrame, slot)
 
     def unPause(self):
         self.ThreadActive = True
@@ -723,4 +602,5 @@ if __name__ == "__main__":
     window.setIconSize(QSize(16, 16))
     center_widget(window)
     window.show()
+    startupTimer.phase("show window")
     sys.exit(app.exec())
@@ -0,0 +1,66 @@
+# benchmark_autocontrast.py
+"""
+Compare the old PIL frame preprocessing with the OpenCV one.
+
+Run from the repository root:
+    python -m pruebas_funciones.benchmark_autocontrast [image or video]
+
+The old path is what Worker1 did before: resize, PIL autocontrast and the
+color flips around the plate model. The new path is the resize, the LUT
+autocontrast and a single color conversion.
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import ImageOps
+
+from ai.img_model import autocontrast, to_img_opencv, to_img_pil
+
+
+def old_path(frame):
+    resize = cv2.resize(frame, (960, 540))
+    effect = ImageOps.autocontrast(to_img_pil(resize), cutoff=1)
+    resize = cv2.cvtColor(to_img_opencv(effect), cv2.COLOR_BGR2RGB)
+    modelInput = cv2.cvtColor(resize, cv2.COLOR_BGR2RGB)
+    return modelInput, cv2.cvtColor(modelInput, cv2.COLOR_BGR2RGB)
+
+
+def new_path(frame):
+    resize = cv2.resize(frame, (960, 540))
+    modelInput = autocontrast(resize, cutoff=1, dst=resize)
+    return modelInput, cv2.cvtColor(modelInput, cv2.COLOR_BGR2RGB)
+
+
+def load_frame(path):
+    if path is None:
+        rng = np.random.default_rng(0)
+        return (rng.random((1080, 1920, 3)) * 200 + 20).astype(np.uint8)
+    frame = cv2.imread(path)
+    if frame is None:
+        capture = cv2.VideoCapture(path)
+        _, frame = capture.read()
+        capture.release()
+    return frame
+
+
+def benchmark(function, frame, repeat=200):
+    function(frame)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(frame)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    frame = load_frame(sys.argv[1] if len(sys.argv) > 1 else None)
+
+    oldInput, oldView = old_path(frame)
+    newInput, newView = new_path(frame)
+    print("Model input identical:", np.array_equal(oldInput, newInput))
+    print("View frame identical:", np.array_equal(oldView, newView))
+
+    print(f"Old path: {benchmark(old_path, frame):.2f} ms/frame")
+    print(f"New path: {benchmark(new_path, frame):.2f} ms/frame")
@@ -0,0 +1,292 @@
+# quantize_char_model.py
+"""
+INT8 post-training quantization of the char model, calibrated on the plate
+pictures the application saved in temp/.
+
+The char model runs once per plate crop, so on CPU-only gate PCs it bounds
+how many lanes one machine can follow. This tool quantizes the ONNX and/or
+OpenVINO export of the char model (see export_models.py) with activation
+ranges measured on real crops, then reports how the INT8 model reads a
+held-out part of the crops against the FP32 export.
+
+The pictures are named after the plate the application registered, e.g.
+``8XO988_08-06-39_2025-01-23.jpg``, and that prefix is the expected text.
+Those readings came from the deployed model, so the accuracy is agreement
+with past registered readings rather than hand-checked ground truth.
+
+Set ``charint8 = true`` in the [MODELCONFIG] section of config.ini to use
+the INT8 model.
+
+Examples:
+    python quantize_char_model.py --format openvino
+    python quantize_char_model.py --format onnx --calibration 200 --report int8.csv
+"""
+
+import argparse
+import csv
+import os
+import random
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ai.img_model import letterbox
+from ai.models import (
+    EXPORT_FORMATS,
+    export_model,
+    exported_path,
+    get_device,
+    load_model,
+)
+from ai.recognition import PlateRecognizer
+from configParams import Parameters
+from export_models import load_crops
+
+# Element-wise ops of the detection head that decode the boxes; they stay in
+# floating point, as ultralytics does for its own INT8 exports
+HEAD_DECODE_OPS = ("Add", "Sub", "Subtract", "Mul", "Multiply", "Div",
+                   "Divide", "Sigmoid")
+
+
+def plate_label(name):
+    """Return the plate text a picture is named after."""
+    return name.split("_", 1)[0]
+
+
+def model_input(crop, shape):
+    """
+    Build the char model input of a crop exactly as the pipeline does.
+
+    The crop is letterboxed to ``char_batch_shape`` like in
+    ``PlateRecognizer.recognizeChars``, then channel-swapped, transposed and
+    scaled like the ultralytics predictor does before the model.
+
+    Args:
+        crop (np.ndarray): RGB plate crop.
+        shape (tuple): char_batch_shape, as (height, width).
+
+    Returns:
+        np.ndarray: (1, 3, height, width) float32 tensor.
+    """
+    image, _, _ = letterbox(crop, shape)
+    tensor = image[..., ::-1].transpose(2, 0, 1)[None]
+    return np.ascontiguousarray(tensor, dtype=np.float32) / 255
+
+
+def head_decode_nodes(nodes):
+    """
+    Find the box decoding nodes of the detection head.
+
+    Args:
+        nodes (list of tuple): (name, op type) of every graph node. Node
+            names keep the module path, e.g. "/model.22/dfl/conv/Conv".
+
+    Returns:
+        list of str: Names of the nodes to keep in floating point.
+    """
+    indexes = [int(match) for name, _ in nodes
+               for match in re.findall(r"model\.(\d+)", name)]
+    if not indexes:
+        return []
+    head = re.compile(rf"model\.{max(indexes)}(?!\d)")
+    return [name for name, op in nodes
+            if head.search(name) and (op in HEAD_DECODE_OPS or "dfl" in name)]
+
+
+def quantize_onnx(weights, calibration):
+    """
+    Quantize the ONNX export with ONNX Runtime static quantization.
+
+    Args:
+        weights (str): PyTorch weights of the char model.
+        calibration (list of np.ndarray): Model inputs.
+
+    Returns:
+        str: Path of the INT8 model.
+    """
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    source = exported_path(weights, "onnx")
+    target = exported_path(weights, "onnx", int8=True)
+    model = onnx.load(source)
+    inputName = model.graph.input[0].name
+
+    class CropReader(CalibrationDataReader):
+        def __init__(self):
+            self.inputs = iter(calibration)
+
+        def get_next(self):
+            tensor = next(self.inputs, None)
+            return None if tensor is None else {inputName: tensor}
+
+    quantize_static(
+        source,
+        target,
+        CropReader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        nodes_to_exclude=head_decode_nodes(
+            [(node.name, node.op_type) for node in model.graph.node]
+        ),
+    )
+    # ultralytics reads the class names and sizes from the metadata
+    quantized = onnx.load(target)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(model.metadata_props)
+    onnx.save(quantized, target)
+    return target
+
+
+def quantize_openvino(weights, calibration):
+    """
+    Quantize the OpenVINO export with NNCF.
+
+    Args:
+        weights (str): PyTorch weights of the char model.
+        calibration (list of np.ndarray): Model inputs.
+
+    Returns:
+        str: Folder of the INT8 model.
+    """
+    import nncf
+    import openvino as ov
+
+    source = Path(exported_path(weights, "openvino"))
+    target = Path(exported_path(weights, "openvino", int8=True))
+    xml = next(source.glob("*.xml"))
+    model = ov.Core().read_model(xml)
+    ignored = head_decode_nodes(
+        [(op.get_friendly_name(), op.get_type_name()) for op in model.get_ops()]  # noqa
+    )
+    quantized = nncf.quantize(
+        model,
+        nncf.Dataset(calibration),
+        preset=nncf.QuantizationPreset.MIXED,
+        ignored_scope=nncf.IgnoredScope(names=ignored, validate=False),
+    )
+    target.mkdir(parents=True, exist_ok=True)
+    ov.save_model(quantized, target / xml.name, compress_to_fp16=False)
+    # ultralytics reads the class names and sizes from the metadata
+    shutil.copy(source / "metadata.yaml", target / "metadata.yaml")
+    return str(target)
+
+
+def evaluate(model, crops, recognizer):
+    """
+    Read every crop with a model, as the pipeline would.
+
+    Returns:
+        tuple: (corrected plate texts, mean seconds per crop).
+    """
+    texts = []
+    began = time.perf_counter()
+    for _, crop in crops:
+        plateText, _, _ = recognizer.recognizeChars([crop], model)[0]
+        texts.append(recognizer.correctPlateText(plateText))
+    return texts, (time.perf_counter() - began) / max(len(crops), 1)
+
+
+def char_accuracy(texts, labels):
+    """Fraction of label characters read correctly, position by position."""
+    correct = sum(a == b for text, label in zip(texts, labels)
+                  for a, b in zip(text, label))
+    total = sum(max(len(text), len(label)) for text, label in zip(texts, labels))  # noqa
+    return correct / max(total, 1)
+
+
+def report(fmt, crops, labels, fp32, int8, path=None):
+    """Print the accuracy report and optionally save the per-crop rows."""
+    (fp32Texts, fp32Time), (int8Texts, int8Time) = fp32, int8
+    count = max(len(labels), 1)
+
+    def exact(texts):
+        return sum(text == label for text, label in zip(texts, labels)) / count  # noqa
+
+    agree = sum(a == b for a, b in zip(fp32Texts, int8Texts)) / count
+    print(f"{fmt} on {len(labels)} held-out crops:")
+    print(f"  FP32 plate accuracy {exact(fp32Texts):.1%}, char accuracy {char_accuracy(fp32Texts, labels):.1%}, {fp32Time * 1000:.1f} ms/crop")  # noqa
+    print(f"  INT8 plate accuracy {exact(int8Texts):.1%}, char accuracy {char_accuracy(int8Texts, labels):.1%}, {int8Time * 1000:.1f} ms/crop")  # noqa
+    print(f"  FP32/INT8 agreement {agree:.1%}, speedup {fp32Time / max(int8Time, 1e-9):.2f}x")  # noqa
+    for (name, _), label, a, b in zip(crops, labels, fp32Texts, int8Texts):
+        if a == label and b != label:
+            print(f"  regression {name}: {a} -> {b}")
+
+    if path:
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["file", "label", "fp32", "int8"])
+            for (name, _), label, a, b in zip(crops, labels, fp32Texts, int8Texts):  # noqa
+                writer.writerow([name, label, a, b])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Quantize the char model to INT8 using the crops in temp/."
+    )
+    parser.add_argument("--weights", default=None,
+                        help="Char model weights (default: config.ini charmodel).")  # noqa
+    parser.add_argument("--format", nargs="+", choices=EXPORT_FORMATS,
+                        default=["openvino"],
+                        help="Exports to quantize (default openvino).")
+    parser.add_argument("--crops", default="temp",
+                        help="Folder of plate pictures (default temp).")
+    parser.add_argument("--calibration", type=int, default=128,
+                        help="Crops used for calibration, at most half of "
+                             "them; the rest are used for the report.")
+    parser.add_argument("--report", default=None,
+                        help="CSV file with the reading of every held-out crop.")  # noqa
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the calibration/report split.")
+    args = parser.parse_args()
+
+    params = Parameters()
+    weights = args.weights or params.modelCharX_path
+    crops = load_crops(args.crops, sys.maxsize)
+    if len(crops) < 2:
+        print(f"Not enough crops in {args.crops}")
+        return 1
+
+    # Calibrate and evaluate on different crops
+    random.Random(args.seed).shuffle(crops)
+    calibrationSize = min(args.calibration, len(crops) // 2)
+    calibrationCrops, heldOut = crops[:calibrationSize], crops[calibrationSize:]  # noqa
+    calibration = [model_input(crop, params.char_batch_shape)
+                   for _, crop in calibrationCrops]
+    labels = [plate_label(name) for name, _ in heldOut]
+    print(f"{len(calibrationCrops)} calibration crops, {len(heldOut)} held out")  # noqa
+
+    device = get_device("cpu")
+    recognizer = PlateRecognizer(params, None)
+    for fmt in args.format:
+        if not os.path.exists(exported_path(weights, fmt)):
+            export_model(weights, fmt, list(params.char_batch_shape))
+        if fmt == "onnx":
+            target = quantize_onnx(weights, calibration)
+        else:
+            target = quantize_openvino(weights, calibration)
+        print(f"Quantized {weights} to {target}")
+
+        fp32 = evaluate(load_model(weights, device, fmt), heldOut, recognizer)
+        int8 = evaluate(load_model(weights, device, fmt, int8=True), heldOut, recognizer)  # noqa
+        reportPath = args.report
+        if reportPath and len(args.format) > 1:
+            root, ext = os.path.splitext(reportPath)
+            reportPath = f"{root}_{fmt}{ext}"
+        report(fmt, heldOut, labels, fp32, int8, reportPath)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,7 +8,6 @@ Provides functionality for adding, editing, and viewing resident details.
 import sys
 from pathlib import Path
 
-import pandas as pd
 from PySide6.QtCore import QSize
 from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import QDialog, QApplication
@@ -226,6 +225,7 @@ class residentsAddNewWindow(QDialog):
 
     def export_to_csv(self, data):
         """Export resident data to CSV file."""
+        import pandas as pd  # Imported on use, it is slow to load
         df = pd.DataFrame({
             'fName': [data['first_name']],
             'lName': [data['last_name']],